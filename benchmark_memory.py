@@ -0,0 +1,102 @@
+"""Compare the memory used by PlayerStats/Challenge records against the plain dicts they replaced.
+
+Run with: python benchmark_memory.py [record_count]
+"""
+import gc
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from models import Challenge, PlayerStats
+
+GAMES = ["Littoral Commander", "Battlegroup Clash Baltics", "Down Range", "Take That Street"]
+GUILD_ID = 123456789012345678
+
+def stats_documents(count: int) -> List[dict]:
+    """player_stats documents shaped as Firestore returns them"""
+    return [
+        {
+            'discord_guild_id': GUILD_ID,
+            'player_id': 200000000000000000 + i,
+            'player_name': f"Player{i}",
+            'game': GAMES[i % len(GAMES)],
+            'wins': i % 37,
+            'losses': i % 23,
+            'draws': i % 5,
+            'total_games': i % 37 + i % 23 + i % 5
+        }
+        for i in range(count)
+    ]
+
+def challenge_documents(count: int) -> List[tuple]:
+    """(document ID, challenges document) pairs shaped as Firestore returns them"""
+    created = datetime(2024, 1, 1)
+    return [
+        (f"challenge{i:014d}", {
+            'challenger_id': 200000000000000000 + i,
+            'challenger_name': f"Player{i}",
+            'opponent_id': 300000000000000000 + i,
+            'opponent_name': f"Opponent{i}",
+            'game': GAMES[i % len(GAMES)],
+            'status': 'accepted',
+            'result': None,
+            'winner_id': None,
+            'loser_id': None,
+            'created_at': created + timedelta(seconds=i),
+            'accepted_at': created + timedelta(seconds=i + 60),
+            'completed_at': None,
+            'discord_guild_id': GUILD_ID,
+            'discord_channel_id': 400000000000000000
+        })
+        for i in range(count)
+    ]
+
+def stats_as_dicts(documents: List[dict]) -> list:
+    """The previous representation: a copy of each document plus a stored win_rate"""
+    return [
+        {**data, 'win_rate': round((data['wins'] / data['total_games']) * 100 if data['total_games'] > 0 else 0, 1)}
+        for data in documents
+    ]
+
+def stats_as_records(documents: List[dict]) -> list:
+    return [PlayerStats.from_dict(data) for data in documents]
+
+def challenges_as_dicts(documents: List[tuple]) -> list:
+    """The previous representation: the document copied into a new dict with its ID"""
+    return [{"id": challenge_id, **data} for challenge_id, data in documents]
+
+def challenges_as_records(documents: List[tuple]) -> list:
+    return [Challenge.from_dict(challenge_id, data) for challenge_id, data in documents]
+
+def measure(build: Callable[[list], list], documents: list) -> int:
+    """Bytes still allocated by build()'s result once it returns"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(documents)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+def report(label: str, dict_bytes: int, record_bytes: int, count: int):
+    per_100k = 100_000 / count
+    print(f"{label}:")
+    print(f"  dicts:   {dict_bytes * per_100k / 1024 / 1024:8.1f} MiB per 100k ({dict_bytes / count:6.0f} B/record)")
+    print(f"  records: {record_bytes * per_100k / 1024 / 1024:8.1f} MiB per 100k ({record_bytes / count:6.0f} B/record)")
+    print(f"  saving:  {(1 - record_bytes / dict_bytes) * 100:8.1f}%")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    # Values shared with the source documents (names, timestamps) are counted
+    # in neither measurement, only the containers built on top of them
+    stats_docs = stats_documents(count)
+    report("PlayerStats", measure(stats_as_dicts, stats_docs), measure(stats_as_records, stats_docs), count)
+
+    challenge_docs = challenge_documents(count)
+    report("Challenge", measure(challenges_as_dicts, challenge_docs), measure(challenges_as_records, challenge_docs), count)
+
+if __name__ == "__main__":
+    main()
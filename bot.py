@@ -1,11 +1,21 @@
+import time
+
+# Taken before the remaining imports so startup metrics include them
+_PROCESS_START = time.perf_counter()
+
 import discord
+from discord import app_commands
 from discord.ext import commands
 import asyncio
-from typing import Optional
+import re
+import signal
+from typing import Dict, List, Optional, Tuple
 import config
+import tournament
 from database import ChallengeDatabase
+from resilience import backoff_delay
 
-class ChallengeBot(commands.Bot):
+class ChallengeBot(commands.AutoShardedBot):
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
@@ -14,19 +24,101 @@ class ChallengeBot(commands.Bot):
         super().__init__(
             command_prefix=config.COMMAND_PREFIX,
             intents=intents,
-            help_command=None
+            help_command=None,
+            # None lets Discord pick the shard count; set DISCORD_SHARD_IDS to
+            # split shards across several processes
+            shard_count=config.DISCORD_SHARD_COUNT,
+            shard_ids=config.DISCORD_SHARD_IDS
         )
         
+        # Connecting to Firestore is deferred to setup_hook so it overlaps
+        # with the gateway login instead of blocking it
         self.db = ChallengeDatabase()
+        self.startup_metrics = {}
+        self._backend_ready = asyncio.Event()
+        self._background_tasks = set()
         
     async def setup_hook(self):
         """Setup hook to load cogs and prepare the bot"""
         print("Setting up ChallengeBot...")
+        self.startup_metrics['setup_hook'] = time.perf_counter() - _PROCESS_START
+        
+        # Neither of these needs the gateway, so run them alongside it
+        startup = [self._start_backend()]
+        if config.SYNC_COMMANDS:
+            startup.append(self._sync_commands())
+        for coro in startup:
+            task = asyncio.create_task(coro)
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        
+    async def _start_backend(self):
+        """Connect to Firestore and warm up its channel, then open the readiness gate.
+        
+        A failed connect is retried with backoff until it succeeds, so a brief
+        outage during a deploy delays commands instead of disabling them."""
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                await asyncio.to_thread(self.db.connect)
+                break
+            except Exception as e:
+                delay = backoff_delay(attempt, config.FIRESTORE_RETRY_BASE_DELAY, config.BACKEND_CONNECT_MAX_DELAY)
+                print(f"Database failed to start, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                attempt += 1
+                
+        connected = time.perf_counter()
+        await asyncio.to_thread(self.db.warm_up)
+        warmed_up = time.perf_counter()
+        
+        self.startup_metrics['backend_connect'] = connected - started
+        self.startup_metrics['backend_warm_up'] = warmed_up - connected
+        self.startup_metrics['backend_ready'] = warmed_up - _PROCESS_START
+        print(f"Database ready {self.startup_metrics['backend_ready']:.2f}s after start "
+              f"(connect {self.startup_metrics['backend_connect']:.2f}s, "
+              f"warm-up {self.startup_metrics['backend_warm_up']:.2f}s)")
+        self._backend_ready.set()
+            
+    async def sync_commands(self) -> str:
+        """Register slash commands with Discord, returning where they were registered"""
+        # Register slash commands to DISCORD_GUILD_ID when set so they show up
+        # immediately; otherwise sync globally for multi-guild deployments
+        if config.DISCORD_GUILD_ID:
+            guild = discord.Object(id=config.DISCORD_GUILD_ID)
+            self.tree.copy_global_to(guild=guild)
+            synced = await self.tree.sync(guild=guild)
+            return f"Synced {len(synced)} slash command(s) to guild {config.DISCORD_GUILD_ID}"
+        synced = await self.tree.sync()
+        return f"Synced {len(synced)} slash command(s) globally"
+        
+    async def _sync_commands(self):
+        """Sync slash commands at startup when SYNC_COMMANDS is set"""
+        try:
+            print(await self.sync_commands())
+        except Exception as e:
+            print(f"Error syncing slash commands: {e}")
+            
+    async def wait_until_backend_ready(self):
+        """Wait for the database to finish starting; commands queue here until it has"""
+        try:
+            await asyncio.wait_for(self._backend_ready.wait(), timeout=config.BACKEND_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise RuntimeError("The bot is still starting up, please try again in a moment") from None
+        
+    async def on_shard_ready(self, shard_id: int):
+        """Called when a single shard has connected"""
+        print(f'Shard {shard_id} is ready')
         
     async def on_ready(self):
         """Called when the bot is ready"""
         print(f'{self.user} has connected to Discord!')
-        print(f'Bot is in {len(self.guilds)} guild(s)')
+        print(f'Bot is in {len(self.guilds)} guild(s) across {len(self.shards)} shard(s)')
+        
+        if 'gateway_ready' not in self.startup_metrics:
+            self.startup_metrics['gateway_ready'] = time.perf_counter() - _PROCESS_START
+            print(f"Gateway ready {self.startup_metrics['gateway_ready']:.2f}s after start")
         
         # Set bot status
         await self.change_presence(
@@ -38,7 +130,49 @@ class ChallengeCommands(commands.Cog):
         self.bot = bot
         self.db = bot.db
 
-    @commands.command(name='challenge')
+    async def _db_call(self, func, *args, **kwargs):
+        """Run a blocking database call off the event loop once the database is ready"""
+        await self.bot.wait_until_backend_ready()
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def cog_command_error(self, ctx, error: commands.CommandError):
+        """Tell the user why a command was refused instead of failing silently"""
+        if isinstance(error, (commands.MissingPermissions, commands.NotOwner)):
+            await ctx.send("❌ You don't have permission to use this command.")
+        elif isinstance(error, commands.NoPrivateMessage):
+            await ctx.send("❌ This command can only be used in a server.")
+        elif isinstance(error, commands.UserInputError):
+            await ctx.send(f"❌ {error}")
+        else:
+            print(f"Error in command {ctx.command}: {error}")
+
+    @staticmethod
+    def _note_if_stale(embed: discord.Embed, served_stale: bool):
+        """Flag embeds built from cached data because the database couldn't be reached"""
+        if served_stale:
+            embed.set_footer(text="⚠️ The database is unavailable, showing the last known data")
+
+    @staticmethod
+    def _resolve_game(game: Optional[str]) -> Optional[str]:
+        """Match a game name case-insensitively against the supported games"""
+        if not game:
+            return None
+        lookup = game.strip().lower()
+        return next((g for g in config.SUPPORTED_GAMES if g.lower() == lookup), None)
+
+    async def game_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        """Suggest supported games matching what the user has typed so far"""
+        current = current.lower()
+        return [
+            app_commands.Choice(name=game, value=game)
+            for game in config.SUPPORTED_GAMES
+            if current in game.lower()
+        ][:25]
+
+    @commands.hybrid_command(name='challenge')
+    @commands.guild_only()
+    @app_commands.describe(opponent="The player you want to challenge", game="The game to play")
+    @app_commands.autocomplete(game=game_autocomplete)
     async def challenge(self, ctx, opponent: discord.Member, *, game: str):
         """Challenge another player to a board game"""
         if opponent.bot:
@@ -49,18 +183,24 @@ class ChallengeCommands(commands.Cog):
             await ctx.send("❌ You cannot challenge yourself!")
             return
             
-        if game not in config.SUPPORTED_GAMES:
+        resolved_game = self._resolve_game(game)
+        if not resolved_game:
             games_list = ", ".join(config.SUPPORTED_GAMES)
             await ctx.send(f"❌ Unsupported game! Supported games: {games_list}")
             return
+        game = resolved_game
             
         try:
-            challenge_id = self.db.create_challenge(
+            await ctx.defer()
+            challenge_id = await self._db_call(
+                self.db.create_challenge,
+                guild_id=ctx.guild.id,
                 challenger_id=ctx.author.id,
                 challenger_name=ctx.author.display_name,
                 opponent_id=opponent.id,
                 opponent_name=opponent.display_name,
-                game=game
+                game=game,
+                channel_id=ctx.channel.id
             )
             
             embed = discord.Embed(
@@ -79,16 +219,19 @@ class ChallengeCommands(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Error creating challenge: {str(e)}")
 
-    @commands.command(name='accept')
+    @commands.hybrid_command(name='accept')
+    @commands.guild_only()
+    @app_commands.describe(challenge_id="The ID of the challenge to accept")
     async def accept(self, ctx, challenge_id: str):
         """Accept a pending challenge"""
         try:
-            success = self.db.accept_challenge(challenge_id, ctx.author.id)
+            await ctx.defer()
+            success = await self._db_call(self.db.accept_challenge, ctx.guild.id, challenge_id, ctx.author.id)
             
             if success:
                 # Get challenge details for the embed
-                pending_challenges = self.db.get_pending_challenges_for_user(ctx.author.id)
-                challenge = next((c for c in pending_challenges if c['id'] == challenge_id), None)
+                active_challenges = await self._db_call(self.db.get_active_challenges, ctx.guild.id, ctx.author.id)
+                challenge = next((c for c in active_challenges if c.id == challenge_id), None)
                 
                 if challenge:
                     embed = discord.Embed(
@@ -96,10 +239,10 @@ class ChallengeCommands(commands.Cog):
                         description=f"{ctx.author.mention} has accepted the challenge!",
                         color=discord.Color.green()
                     )
-                    embed.add_field(name="Game", value=challenge['game'], inline=True)
-                    embed.add_field(name="Challenger", value=challenge['challenger_name'], inline=True)
+                    embed.add_field(name="Game", value=challenge.game, inline=True)
+                    embed.add_field(name="Challenger", value=challenge.challenger_name, inline=True)
                     embed.add_field(name="Status", value="🎯 Active", inline=True)
-                    embed.add_field(name="To Report Result", value=f"Use `!report {challenge_id} <win/loss/draw> <winner_id>`", inline=False)
+                    embed.add_field(name="To Report Result", value=f"Use `!report {challenge_id} <win/loss/draw> [@winner]`", inline=False)
                     embed.set_footer(text=f"Challenge accepted by {ctx.author.display_name}")
                     
                     await ctx.send(embed=embed)
@@ -111,17 +254,31 @@ class ChallengeCommands(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Error accepting challenge: {str(e)}")
 
-    @commands.command(name='report')
-    async def report(self, ctx, challenge_id: str, result: str, winner_id: Optional[int] = None):
+    @commands.hybrid_command(name='report')
+    @commands.guild_only()
+    @app_commands.describe(
+        challenge_id="The ID of the challenge to report",
+        result="The outcome from your point of view",
+        winner="The winning player, if not implied by the result"
+    )
+    @app_commands.choices(result=[
+        app_commands.Choice(name="Win", value="win"),
+        app_commands.Choice(name="Loss", value="loss"),
+        app_commands.Choice(name="Draw", value="draw")
+    ])
+    async def report(self, ctx, challenge_id: str, result: str, winner: Optional[discord.Member] = None):
         """Report the result of a completed game"""
+        result = result.lower()
         if result not in ['win', 'loss', 'draw']:
             await ctx.send("❌ Result must be 'win', 'loss', or 'draw'")
             return
+        winner_id = winner.id if winner else None
             
         try:
+            await ctx.defer()
             # Get active challenges to find the challenge
-            active_challenges = self.db.get_active_challenges(ctx.author.id)
-            challenge = next((c for c in active_challenges if c['id'] == challenge_id), None)
+            active_challenges = await self._db_call(self.db.get_active_challenges, ctx.guild.id, ctx.author.id)
+            challenge = next((c for c in active_challenges if c.id == challenge_id), None)
             
             if not challenge:
                 await ctx.send("❌ Challenge not found or not active. Make sure you're part of the challenge and it's been accepted.")
@@ -134,20 +291,22 @@ class ChallengeCommands(commands.Cog):
             if result == 'win':
                 if winner_id:
                     winner_id_final = winner_id
-                    loser_id_final = challenge['challenger_id'] if winner_id == challenge['opponent_id'] else challenge['opponent_id']
+                    loser_id_final = challenge.challenger_id if winner_id == challenge.opponent_id else challenge.opponent_id
                 else:
                     winner_id_final = ctx.author.id
-                    loser_id_final = challenge['challenger_id'] if ctx.author.id == challenge['opponent_id'] else challenge['opponent_id']
+                    loser_id_final = challenge.challenger_id if ctx.author.id == challenge.opponent_id else challenge.opponent_id
             elif result == 'loss':
                 if winner_id:
                     winner_id_final = winner_id
                     loser_id_final = ctx.author.id
                 else:
-                    winner_id_final = challenge['challenger_id'] if ctx.author.id == challenge['opponent_id'] else challenge['opponent_id']
+                    winner_id_final = challenge.challenger_id if ctx.author.id == challenge.opponent_id else challenge.opponent_id
                     loser_id_final = ctx.author.id
             # For draw, both winner_id and loser_id remain None
             
-            success = self.db.report_result(
+            success = await self._db_call(
+                self.db.report_result,
+                guild_id=ctx.guild.id,
                 challenge_id=challenge_id,
                 reporter_id=ctx.author.id,
                 result=result,
@@ -158,20 +317,20 @@ class ChallengeCommands(commands.Cog):
             if success:
                 embed = discord.Embed(
                     title="🏆 Game Result Reported!",
-                    description=f"Result for **{challenge['game']}** has been recorded.",
+                    description=f"Result for **{challenge.game}** has been recorded.",
                     color=discord.Color.gold()
                 )
-                embed.add_field(name="Game", value=challenge['game'], inline=True)
+                embed.add_field(name="Game", value=challenge.game, inline=True)
                 embed.add_field(name="Result", value=result.upper(), inline=True)
                 
                 if result == 'win':
-                    winner_name = challenge['challenger_name'] if winner_id_final == challenge['challenger_id'] else challenge['opponent_name']
-                    loser_name = challenge['challenger_name'] if loser_id_final == challenge['challenger_id'] else challenge['opponent_name']
+                    winner_name = challenge.challenger_name if winner_id_final == challenge.challenger_id else challenge.opponent_name
+                    loser_name = challenge.challenger_name if loser_id_final == challenge.challenger_id else challenge.opponent_name
                     embed.add_field(name="Winner", value=winner_name, inline=True)
                     embed.add_field(name="Loser", value=loser_name, inline=True)
                 elif result == 'loss':
-                    winner_name = challenge['challenger_name'] if winner_id_final == challenge['challenger_id'] else challenge['opponent_name']
-                    loser_name = challenge['challenger_name'] if loser_id_final == challenge['challenger_id'] else challenge['opponent_name']
+                    winner_name = challenge.challenger_name if winner_id_final == challenge.challenger_id else challenge.opponent_name
+                    loser_name = challenge.challenger_name if loser_id_final == challenge.challenger_id else challenge.opponent_name
                     embed.add_field(name="Winner", value=winner_name, inline=True)
                     embed.add_field(name="Loser", value=loser_name, inline=True)
                 else:
@@ -179,23 +338,308 @@ class ChallengeCommands(commands.Cog):
                 
                 embed.set_footer(text=f"Result reported by {ctx.author.display_name}")
                 await ctx.send(embed=embed)
+                
+                if challenge.tournament_id:
+                    await self._advance_tournament(ctx, challenge.tournament_id)
             else:
                 await ctx.send("❌ Failed to report result. Make sure you're part of the challenge and it's been accepted.")
                 
         except Exception as e:
             await ctx.send(f"❌ Error reporting result: {str(e)}")
 
-    @commands.command(name='leaderboard')
-    async def leaderboard(self, ctx, game: str = None):
-        """Show leaderboard for a specific game or overall"""
-        if game and game not in config.SUPPORTED_GAMES:
+    @staticmethod
+    def _parse_batch_results(text: str) -> Tuple[List[Tuple[str, Optional[int]]], List[str]]:
+        """Parse `<challenge_id>, <winner|draw>` lines (CSV, one per line or separated by `;`)"""
+        entries = []
+        errors = []
+        for line_number, line in enumerate(re.split(r'[\n;]', text), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+                
+            fields = [field.strip() for field in re.split(r'[,\s]+', line) if field.strip()]
+            if len(fields) != 2:
+                errors.append(f"Entry {line_number}: expected `<challenge_id>, <winner|draw>`")
+                continue
+                
+            challenge_id, outcome = fields
+            if challenge_id.lower() == 'challenge_id':
+                continue  # CSV header
+                
+            if outcome.lower() == 'draw':
+                entries.append((challenge_id, None))
+                continue
+                
+            match = re.fullmatch(r'<@!?(\d+)>|(\d+)', outcome)
+            if not match:
+                errors.append(f"Entry {line_number}: winner must be a user mention, user ID or `draw`")
+                continue
+            entries.append((challenge_id, int(match.group(1) or match.group(2))))
+            
+        return entries, errors
+
+    @commands.hybrid_command(name='reportbatch')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.describe(
+        results_file="A CSV file with one `challenge_id,winner` row per game",
+        results="Results as `challenge_id winner` pairs separated by `;` (winner is a user ID or draw)"
+    )
+    async def reportbatch(self, ctx, results_file: Optional[discord.Attachment] = None, *, results: Optional[str] = None):
+        """Report many game results at once (organizers only)"""
+        try:
+            await ctx.defer()
+            
+            text = results or ""
+            if results_file:
+                text += "\n" + (await results_file.read()).decode('utf-8-sig')
+                
+            entries, errors = self._parse_batch_results(text)
+            if not entries and not errors:
+                await ctx.send("❌ No results found. Attach a CSV or list one `<challenge_id>, <winner|draw>` per line.")
+                return
+            if len(entries) > config.BATCH_REPORT_MAX_RESULTS:
+                errors.append(f"Too many results: at most {config.BATCH_REPORT_MAX_RESULTS} can be reported at once")
+                
+            tournament_ids = []
+            if not errors:
+                applied, skipped, errors, tournament_ids = await self._db_call(
+                    self.db.report_results_batch,
+                    guild_id=ctx.guild.id,
+                    reporter_id=ctx.author.id,
+                    results=entries
+                )
+                
+            if errors:
+                embed = discord.Embed(
+                    title="❌ Batch Not Reported",
+                    description="No results were recorded. Fix these entries and try again:",
+                    color=discord.Color.red()
+                )
+                error_text = "\n".join(errors[:15])
+                if len(errors) > 15:
+                    error_text += f"\n...and {len(errors) - 15} more"
+                embed.add_field(name="Errors", value=error_text[:1024], inline=False)
+                await ctx.send(embed=embed)
+                return
+                
+            draws = sum(1 for _, winner_id in entries if winner_id is None)
+            description = f"{applied} result(s) have been recorded."
+            if skipped:
+                description += f" {skipped} were already recorded and have been skipped."
+            embed = discord.Embed(
+                title="🏆 Batch Results Reported!",
+                description=description,
+                color=discord.Color.gold()
+            )
+            embed.add_field(name="Decisive", value=len(entries) - draws, inline=True)
+            embed.add_field(name="Draws", value=draws, inline=True)
+            embed.set_footer(text=f"Results reported by {ctx.author.display_name}")
+            await ctx.send(embed=embed)
+            
+            for tournament_id in tournament_ids:
+                await self._advance_tournament(ctx, tournament_id)
+            
+        except Exception as e:
+            await ctx.send(f"❌ Error reporting results: {str(e)}\n"
+                           "Some results may already have been recorded. It's safe to send the same list again: "
+                           "results that were recorded are skipped.")
+
+    async def _advance_tournament(self, ctx, tournament_id: str):
+        """Move a tournament on to its next round if the current one is finished, announcing the result.
+        
+        Called after results have been committed, so a failure here is reported
+        on its own rather than as a failure to record them."""
+        try:
+            summary = await self._db_call(self.db.advance_tournament, ctx.guild.id, tournament_id)
+        except Exception as e:
+            print(f"Error advancing tournament {tournament_id}: {e}")
+            await ctx.send(f"⚠️ Results were saved, but the next round of tournament {tournament_id} couldn't be paired. "
+                           f"An organizer can pair it with `!tournament advance {tournament_id}`.")
+            return
+        if not summary:
+            return
+        if summary['round']:
+            await self._send_tournament_round(ctx, summary)
+        else:
+            await ctx.send(embed=self._tournament_standings_embed(summary, title=f"🏁 {summary['name']} - Final Standings"))
+
+    async def _send_tournament_round(self, ctx, summary: Dict):
+        """Announce a round's pairings, split across messages for large fields"""
+        round_info = summary['round']
+        lines = [
+            f"**{c['challenger_name']}** vs **{c['opponent_name']}** (ID: {c['id']})"
+            for c in round_info['challenges']
+        ]
+        if round_info['bye']:
+            lines.append(f"**{round_info['bye']}** has a bye")
+            
+        # Embed descriptions are capped at 4096 characters
+        chunks = [[]]
+        for line in lines:
+            if sum(len(existing) + 1 for existing in chunks[-1]) + len(line) > 4000:
+                chunks.append([])
+            chunks[-1].append(line)
+            
+        for i, chunk in enumerate(chunks):
+            embed = discord.Embed(
+                title=f"🏟️ {summary['name']} - Round {round_info['round']}/{summary['total_rounds']}" if i == 0 else None,
+                description="\n".join(chunk),
+                color=discord.Color.orange()
+            )
+            if i == len(chunks) - 1:
+                embed.set_footer(text=f"Tournament ID: {summary['id']} | Report with !report or !reportbatch")
+            await ctx.send(embed=embed)
+
+    def _tournament_standings_embed(self, summary: Dict, title: str) -> discord.Embed:
+        """Build an embed with the top of a tournament's standings"""
+        embed = discord.Embed(
+            title=title,
+            description=f"{summary['game']} | {'Swiss' if summary['format'] == tournament.SWISS else 'Round robin'} | "
+                        f"Round {summary['current_round']}/{summary['total_rounds']}",
+            color=discord.Color.gold()
+        )
+        standings_text = "\n".join(
+            f"#{i} **{standing['player_name']}** - {standing['score']:g} pts"
+            for i, standing in enumerate(summary['standings'][:20], 1)
+        )
+        embed.add_field(name="Standings", value=standings_text or "No players", inline=False)
+        embed.set_footer(text=f"Tournament ID: {summary['id']}")
+        return embed
+
+    @commands.hybrid_group(name='tournament', invoke_without_command=True)
+    @commands.guild_only()
+    async def tournament_group(self, ctx):
+        """Run Swiss or round robin tournaments"""
+        await ctx.send("Usage: `!tournament start <swiss|roundrobin> \"<game>\" @player1 @player2 ...`, "
+                       "`!tournament standings <tournament_id>` or `!tournament advance <tournament_id>`")
+
+    @tournament_group.command(name='start')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    @app_commands.describe(
+        tournament_format="Swiss pairs by score; round robin has everyone play everyone",
+        game="The game to play",
+        players="Mention every player (or a role) taking part"
+    )
+    @app_commands.choices(tournament_format=[
+        app_commands.Choice(name="Swiss", value=tournament.SWISS),
+        app_commands.Choice(name="Round robin", value=tournament.ROUND_ROBIN)
+    ])
+    @app_commands.autocomplete(game=game_autocomplete)
+    async def tournament_start(self, ctx, tournament_format: str, game: str, *, players: str):
+        """Start a tournament and create its first round of challenges"""
+        tournament_format = tournament_format.lower().replace('-', '_')
+        if tournament_format == 'roundrobin':
+            tournament_format = tournament.ROUND_ROBIN
+        if tournament_format not in tournament.FORMATS:
+            await ctx.send("❌ Format must be `swiss` or `roundrobin`")
+            return
+            
+        resolved_game = self._resolve_game(game)
+        if not resolved_game:
             games_list = ", ".join(config.SUPPORTED_GAMES)
             await ctx.send(f"❌ Unsupported game! Supported games: {games_list}")
             return
             
+        members = {}
+        for player_id in re.findall(r'<@!?(\d+)>|\b(\d{15,20})\b', players):
+            member = ctx.guild.get_member(int(player_id[0] or player_id[1]))
+            if member and not member.bot:
+                members[member.id] = member
+        # A role mention enters everyone with that role
+        for role_id in re.findall(r'<@&(\d+)>', players):
+            role = ctx.guild.get_role(int(role_id))
+            if role:
+                members.update((member.id, member) for member in role.members if not member.bot)
+        if len(members) < 2:
+            await ctx.send("❌ A tournament needs at least two players. Mention each player or a role taking part.")
+            return
+        if len(members) > config.TOURNAMENT_MAX_PLAYERS:
+            await ctx.send(f"❌ A tournament can have at most {config.TOURNAMENT_MAX_PLAYERS} players.")
+            return
+            
+        try:
+            await ctx.defer()
+            format_name = 'Swiss' if tournament_format == tournament.SWISS else 'Round Robin'
+            summary = await self._db_call(
+                self.db.create_tournament,
+                guild_id=ctx.guild.id,
+                organizer_id=ctx.author.id,
+                name=f"{resolved_game} {format_name}",
+                game=resolved_game,
+                tournament_format=tournament_format,
+                players=[(member.id, member.display_name) for member in members.values()],
+                channel_id=ctx.channel.id
+            )
+            await self._send_tournament_round(ctx, summary)
+            
+        except Exception as e:
+            await ctx.send(f"❌ Error starting tournament: {str(e)}")
+
+    @tournament_group.command(name='standings')
+    @commands.guild_only()
+    @app_commands.describe(tournament_id="The ID of the tournament")
+    async def tournament_standings(self, ctx, tournament_id: str):
+        """Show a tournament's standings"""
+        try:
+            await ctx.defer()
+            summary = await self._db_call(self.db.get_tournament, ctx.guild.id, tournament_id)
+            
+            if not summary:
+                await ctx.send("❌ Tournament not found.")
+                return
+                
+            await ctx.send(embed=self._tournament_standings_embed(summary, title=f"🏟️ {summary['name']}"))
+            
+        except Exception as e:
+            await ctx.send(f"❌ Error getting tournament: {str(e)}")
+
+    @tournament_group.command(name='advance')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    @app_commands.describe(tournament_id="The ID of the tournament")
+    async def tournament_advance(self, ctx, tournament_id: str):
+        """Start the next round once every game in the current one has been reported"""
         try:
+            await ctx.defer()
+            summary = await self._db_call(self.db.advance_tournament, ctx.guild.id, tournament_id)
+            
+            if not summary:
+                await ctx.send("❌ The tournament wasn't found, has finished, or its current round still has games to report.")
+                return
+                
+            if summary['round']:
+                await self._send_tournament_round(ctx, summary)
+            else:
+                await ctx.send(embed=self._tournament_standings_embed(summary, title=f"🏁 {summary['name']} - Final Standings"))
+                
+        except Exception as e:
+            await ctx.send(f"❌ Error advancing tournament: {str(e)}")
+
+    @commands.hybrid_command(name='leaderboard')
+    @commands.guild_only()
+    @app_commands.describe(game="Show the leaderboard for one game instead of overall")
+    @app_commands.autocomplete(game=game_autocomplete)
+    async def leaderboard(self, ctx, *, game: Optional[str] = None):
+        """Show leaderboard for a specific game or overall"""
+        if game:
+            resolved_game = self._resolve_game(game)
+            if not resolved_game:
+                games_list = ", ".join(config.SUPPORTED_GAMES)
+                await ctx.send(f"❌ Unsupported game! Supported games: {games_list}")
+                return
+            game = resolved_game
+            
+        try:
+            # The overall leaderboard scans every stats document, so acknowledge
+            # the interaction before Discord's response window runs out
+            await ctx.defer()
             if game:
-                leaderboard = self.db.get_leaderboard(game)
+                leaderboard, served_stale = await self._db_call(
+                    self.db.get_leaderboard, ctx.guild.id, game, include_staleness=True
+                )
                 
                 if not leaderboard:
                     await ctx.send(f"No statistics available for {game} yet!")
@@ -208,17 +652,20 @@ class ChallengeCommands(commands.Cog):
                 )
                 
                 for i, player in enumerate(leaderboard[:10], 1):
-                    player_display_name = player.get('player_name', f"Player #{player['player_id']}")
+                    player_display_name = player.player_name
                     embed.add_field(
                         name=f"#{i} {player_display_name}",
-                        value=f"Wins: {player['wins']} | Losses: {player['losses']} | Win Rate: {player['win_rate']}%",
+                        value=f"Wins: {player.wins} | Losses: {player.losses} | Win Rate: {player.win_rate}%",
                         inline=False
                     )
                     
+                self._note_if_stale(embed, served_stale)
                 await ctx.send(embed=embed)
             else:
                 # Show overall leaderboard across all games
-                overall_leaderboard = self.db.get_overall_leaderboard()
+                overall_leaderboard, served_stale = await self._db_call(
+                    self.db.get_overall_leaderboard, ctx.guild.id, include_staleness=True
+                )
                 
                 if not overall_leaderboard:
                     embed = discord.Embed(
@@ -247,13 +694,13 @@ class ChallengeCommands(commands.Cog):
                 
                 for i, player in enumerate(overall_leaderboard[:10], 1):
                     # Build overall stats line
-                    overall_line = f"**Total:** {player['wins']}W-{player['losses']}L-{player['draws']}D (Win Rate: {player['win_rate']}%)\n"
+                    overall_line = f"**Total:** {player.wins}W-{player.losses}L-{player.draws}D (Win Rate: {player.win_rate}%)\n"
                     
                     # Build game breakdown
                     game_breakdown = []
-                    for game_name, game_stats in player['games'].items():
-                        if game_stats['total_games'] > 0:  # Only show games they've played
-                            game_line = f"├ **{game_name}**: {game_stats['wins']}W-{game_stats['losses']}L-{game_stats['draws']}D"
+                    for game_name, game_stats in player.games.items():
+                        if game_stats.total_games > 0:  # Only show games they've played
+                            game_line = f"├ **{game_name}**: {game_stats.wins}W-{game_stats.losses}L-{game_stats.draws}D"
                             game_breakdown.append(game_line)
                     
                     # Join with newlines, replace last ├ with └
@@ -265,7 +712,7 @@ class ChallengeCommands(commands.Cog):
                         full_value = overall_line
                     
                     embed.add_field(
-                        name=f"#{i} {player['player_name']}",
+                        name=f"#{i} {player.player_name}",
                         value=full_value,
                         inline=False
                     )
@@ -276,18 +723,32 @@ class ChallengeCommands(commands.Cog):
                     inline=False
                 )
                 
+                self._note_if_stale(embed, served_stale)
                 await ctx.send(embed=embed)
                 
         except Exception as e:
             await ctx.send(f"❌ Error getting leaderboard: {str(e)}")
 
-    @commands.command(name='stats')
-    async def stats(self, ctx, member: Optional[discord.Member] = None, game: str = None):
+    @commands.hybrid_command(name='stats')
+    @commands.guild_only()
+    @app_commands.describe(member="The player to look up (defaults to you)", game="Only show stats for this game")
+    @app_commands.autocomplete(game=game_autocomplete)
+    async def stats(self, ctx, member: Optional[discord.Member] = None, *, game: Optional[str] = None):
         """Show statistics for yourself or another player"""
         target_member = member or ctx.author
+        if game:
+            resolved_game = self._resolve_game(game)
+            if not resolved_game:
+                games_list = ", ".join(config.SUPPORTED_GAMES)
+                await ctx.send(f"❌ Unsupported game! Supported games: {games_list}")
+                return
+            game = resolved_game
         
         try:
-            stats = self.db.get_user_stats(target_member.id, game)
+            await ctx.defer()
+            stats, served_stale = await self._db_call(
+                self.db.get_user_stats, ctx.guild.id, target_member.id, game, include_staleness=True
+            )
             
             if game:
                 if not stats:
@@ -298,11 +759,11 @@ class ChallengeCommands(commands.Cog):
                     title=f"📊 {target_member.display_name}'s {game} Stats",
                     color=discord.Color.blue()
                 )
-                embed.add_field(name="Wins", value=stats['wins'], inline=True)
-                embed.add_field(name="Losses", value=stats['losses'], inline=True)
-                embed.add_field(name="Draws", value=stats['draws'], inline=True)
-                embed.add_field(name="Total Games", value=stats['total_games'], inline=True)
-                embed.add_field(name="Win Rate", value=f"{stats['win_rate']}%", inline=True)
+                embed.add_field(name="Wins", value=stats.wins, inline=True)
+                embed.add_field(name="Losses", value=stats.losses, inline=True)
+                embed.add_field(name="Draws", value=stats.draws, inline=True)
+                embed.add_field(name="Total Games", value=stats.total_games, inline=True)
+                embed.add_field(name="Win Rate", value=f"{stats.win_rate}%", inline=True)
                 
             else:
                 if not stats:
@@ -317,21 +778,26 @@ class ChallengeCommands(commands.Cog):
                 for game_name, game_stats in stats.items():
                     embed.add_field(
                         name=game_name,
-                        value=f"W: {game_stats['wins']} L: {game_stats['losses']} D: {game_stats['draws']} ({game_stats['win_rate']}%)",
+                        value=f"W: {game_stats.wins} L: {game_stats.losses} D: {game_stats.draws} ({game_stats.win_rate}%)",
                         inline=True
                     )
                     
+            self._note_if_stale(embed, served_stale)
             await ctx.send(embed=embed)
             
         except Exception as e:
             await ctx.send(f"❌ Error getting stats: {str(e)}")
 
-    @commands.command(name='challenges')
+    @commands.hybrid_command(name='challenges')
+    @commands.guild_only()
     async def challenges(self, ctx):
         """Show pending and active challenges for the user"""
         try:
-            pending_challenges = self.db.get_pending_challenges_for_user(ctx.author.id)
-            active_challenges = self.db.get_active_challenges(ctx.author.id)
+            await ctx.defer()
+            # A single read of the user's open challenge summary
+            open_challenges = await self._db_call(self.db.get_open_challenges, ctx.guild.id, ctx.author.id)
+            pending_challenges = [challenge for challenge in open_challenges if challenge.status == 'pending']
+            active_challenges = [challenge for challenge in open_challenges if challenge.status == 'accepted']
             
             if not pending_challenges and not active_challenges:
                 await ctx.send("You have no pending or active challenges!")
@@ -345,18 +811,18 @@ class ChallengeCommands(commands.Cog):
             if pending_challenges:
                 pending_text = ""
                 for challenge in pending_challenges:
-                    if challenge['challenger_id'] == ctx.author.id:
+                    if challenge.is_challenger:
                         # User sent this challenge
-                        pending_text += f"**{challenge['game']}** - Challenged {challenge['opponent_name']} (ID: {challenge['id']})\n"
+                        pending_text += f"**{challenge.game}** - Challenged {challenge.opponent_name} (ID: {challenge.id})\n"
                     else:
                         # User received this challenge
-                        pending_text += f"**{challenge['game']}** - Challenged by {challenge['challenger_name']} (ID: {challenge['id']})\n"
+                        pending_text += f"**{challenge.game}** - Challenged by {challenge.opponent_name} (ID: {challenge.id})\n"
                 embed.add_field(name="⏳ Pending", value=pending_text, inline=False)
                 
             if active_challenges:
                 active_text = ""
                 for challenge in active_challenges:
-                    active_text += f"**{challenge['game']}** - vs {challenge['opponent_name'] if challenge['challenger_id'] == ctx.author.id else challenge['challenger_name']} (ID: {challenge['id']})\n"
+                    active_text += f"**{challenge.game}** - vs {challenge.opponent_name} (ID: {challenge.id})\n"
                 embed.add_field(name="🎯 Active", value=active_text, inline=False)
                 
             await ctx.send(embed=embed)
@@ -364,11 +830,14 @@ class ChallengeCommands(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Error getting challenges: {str(e)}")
 
-    @commands.command(name='cancel')
+    @commands.hybrid_command(name='cancel')
+    @commands.guild_only()
+    @app_commands.describe(challenge_id="The ID of the challenge to cancel")
     async def cancel(self, ctx, challenge_id: str):
         """Cancel a pending challenge (only challenger can cancel)"""
         try:
-            success = self.db.cancel_challenge(challenge_id, ctx.author.id)
+            await ctx.defer()
+            success = await self._db_call(self.db.cancel_challenge, ctx.guild.id, challenge_id, ctx.author.id)
             
             if success:
                 await ctx.send("✅ Challenge cancelled successfully!")
@@ -378,7 +847,7 @@ class ChallengeCommands(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Error cancelling challenge: {str(e)}")
 
-    @commands.command(name='games')
+    @commands.hybrid_command(name='games')
     async def games(self, ctx):
         """Show all supported games"""
         embed = discord.Embed(
@@ -393,7 +862,7 @@ class ChallengeCommands(commands.Cog):
         
         await ctx.send(embed=embed)
 
-    @commands.command(name='help')
+    @commands.hybrid_command(name='help')
     async def help_command(self, ctx):
         """Show help information"""
         embed = discord.Embed(
@@ -405,8 +874,12 @@ class ChallengeCommands(commands.Cog):
         commands_info = [
             ("!challenge @player <game>", "Challenge another player to a board game"),
             ("!accept <challenge_id>", "Accept a pending challenge"),
-            ("!report <challenge_id> <win/loss/draw> [winner_id]", "Report the result of a completed game"),
-            ("!leaderboard <game>", "Show leaderboard for a specific game"),
+            ("!report <challenge_id> <win/loss/draw> [@winner]", "Report the result of a completed game"),
+            ("!reportbatch [csv attachment] [results]", "Report many results at once, one `<challenge_id>, <winner|draw>` per line (organizers only)"),
+            ("!tournament start <swiss|roundrobin> \"<game>\" @players...", "Start a tournament and pair its first round (organizers only)"),
+            ("!tournament standings <tournament_id>", "Show a tournament's standings"),
+            ("!tournament advance <tournament_id>", "Pair the next round if automatic advancing was missed (organizers only)"),
+            ("!leaderboard [game]", "Show the overall leaderboard or one for a specific game"),
             ("!stats [@player] [game]", "Show statistics for yourself or another player"),
             ("!challenges", "Show your pending and active challenges"),
             ("!cancel <challenge_id>", "Cancel a pending challenge (challenger only)"),
@@ -417,10 +890,20 @@ class ChallengeCommands(commands.Cog):
         for cmd, desc in commands_info:
             embed.add_field(name=cmd, value=desc, inline=False)
             
+        embed.add_field(name="Slash Commands", value="Every command is also available as a slash command, e.g. `/challenge`", inline=False)
         embed.set_footer(text="ChallengeBot - Making board game challenges fun and easy!")
         
         await ctx.send(embed=embed)
 
+    @commands.command(name='sync')
+    @commands.is_owner()
+    async def sync(self, ctx):
+        """Register slash commands with Discord after they change (bot owner only)"""
+        try:
+            await ctx.send(f"✅ {await self.bot.sync_commands()}")
+        except Exception as e:
+            await ctx.send(f"❌ Error syncing slash commands: {str(e)}")
+
 async def main():
     """Main function to run the bot"""
     bot = ChallengeBot()
@@ -428,8 +911,17 @@ async def main():
     # Add the commands cog
     await bot.add_cog(ChallengeCommands(bot))
     
+    # Close the gateway cleanly on SIGTERM so rolling deploys don't wait
+    # out the container stop timeout
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+    except NotImplementedError:
+        pass
+    
     # Run the bot
-    await bot.start(config.DISCORD_TOKEN)
+    async with bot:
+        await bot.start(config.DISCORD_TOKEN)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -7,6 +7,17 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 DISCORD_GUILD_ID = int(os.getenv('DISCORD_GUILD_ID', 0))
 
+# Sharding - leave unset to let Discord recommend a shard count. To spread
+# shards across processes, give each process the same DISCORD_SHARD_COUNT and
+# its own comma-separated DISCORD_SHARD_IDS (e.g. "0,1" and "2,3")
+DISCORD_SHARD_COUNT = int(os.getenv('DISCORD_SHARD_COUNT')) if os.getenv('DISCORD_SHARD_COUNT') else None
+DISCORD_SHARD_IDS = [int(shard_id) for shard_id in os.getenv('DISCORD_SHARD_IDS', '').split(',') if shard_id.strip()] or None
+
+# Register slash commands with Discord at startup. Syncing is heavily rate
+# limited, so enable this on one process at most and only when commands have
+# changed; the owner-only !sync command does the same on demand
+SYNC_COMMANDS = os.getenv('SYNC_COMMANDS', '').lower() in ('1', 'true', 'yes')
+
 # Firebase Configuration
 FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
 FIREBASE_PRIVATE_KEY_ID = os.getenv('FIREBASE_PRIVATE_KEY_ID')
@@ -18,6 +29,33 @@ FIREBASE_TOKEN_URI = os.getenv('FIREBASE_TOKEN_URI', 'https://oauth2.googleapis.
 FIREBASE_AUTH_PROVIDER_X509_CERT_URL = os.getenv('FIREBASE_AUTH_PROVIDER_X509_CERT_URL', 'https://www.googleapis.com/oauth2/v1/certs')
 FIREBASE_CLIENT_X509_CERT_URL = os.getenv('FIREBASE_CLIENT_X509_CERT_URL')
 
+# Firestore resilience - per-RPC timeout, total time budget for a call
+# including retries, retry attempts for reads, and the circuit breaker that
+# switches the bot to read-only mode after repeated failures
+FIRESTORE_CALL_TIMEOUT = float(os.getenv('FIRESTORE_CALL_TIMEOUT', 5))
+FIRESTORE_CALL_DEADLINE = float(os.getenv('FIRESTORE_CALL_DEADLINE', 12))
+FIRESTORE_READ_ATTEMPTS = int(os.getenv('FIRESTORE_READ_ATTEMPTS', 3))
+FIRESTORE_RETRY_BASE_DELAY = float(os.getenv('FIRESTORE_RETRY_BASE_DELAY', 0.2))
+FIRESTORE_RETRY_MAX_DELAY = float(os.getenv('FIRESTORE_RETRY_MAX_DELAY', 2))
+FIRESTORE_BREAKER_THRESHOLD = int(os.getenv('FIRESTORE_BREAKER_THRESHOLD', 5))
+FIRESTORE_BREAKER_RESET = float(os.getenv('FIRESTORE_BREAKER_RESET', 30))
+
+# Bulk result reporting - results committed per Firestore batch and the most
+# a single !reportbatch may contain
+BATCH_REPORT_CHUNK_SIZE = 100
+BATCH_REPORT_MAX_RESULTS = 500
+
+# Largest field a tournament can have; keeps each round's challenges, and the
+# players' open challenge summaries, within a single Firestore batch
+TOURNAMENT_MAX_PLAYERS = 300
+
+# How long commands wait for the database to finish starting before giving up
+BACKEND_READY_TIMEOUT = float(os.getenv('BACKEND_READY_TIMEOUT', 30))
+
+# Longest wait between attempts while connecting to Firestore at startup;
+# the bot keeps retrying until it connects
+BACKEND_CONNECT_MAX_DELAY = float(os.getenv('BACKEND_CONNECT_MAX_DELAY', 30))
+
 # Supported Games
 SUPPORTED_GAMES = [
     "Littoral Commander",
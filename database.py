@@ -1,34 +1,103 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+import functools
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import config
+import tournament
+from models import Challenge, OpenChallenge, PlayerStats, PlayerTotals
+from resilience import CircuitBreaker, CircuitOpenError, LastKnownCache, retry_call
+
+# firebase_admin pulls in grpc and the google-cloud client libraries, which
+# is slow; they're imported by ChallengeDatabase.connect() instead of here
+firebase_admin = None
+firestore = None
+
+def _import_firebase():
+    """Import the Firebase SDK on first use"""
+    global firebase_admin, firestore
+    if firestore is None:
+        import firebase_admin as firebase_admin_module
+        from firebase_admin import firestore as firestore_module
+        firebase_admin = firebase_admin_module
+        firestore = firestore_module
+
+_MISSING = object()
+
+# Attempts at a transaction that keeps losing to concurrent writes, as
+# @firestore.transactional allows by default
+_TRANSACTION_ATTEMPTS = 5
+
+def _is_transient_error(error: Exception) -> bool:
+    """Whether a Firestore error is worth retrying and counts against the backend's health"""
+    from google.api_core import exceptions as api_exceptions
+    return isinstance(error, (
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.DeadlineExceeded,
+        api_exceptions.InternalServerError,
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.Aborted,
+        TimeoutError
+    ))
+
+def _backend_call(idempotent: bool = False, serve_stale: bool = False):
+    """Route a ChallengeDatabase method through the circuit breaker.
+    
+    Idempotent methods are retried on transient errors. Methods marked
+    serve_stale fall back to their last successful result while the
+    backend is unavailable; callers that pass include_staleness=True get
+    (result, served_stale) back so they can tell the user."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, include_staleness: bool = False, **kwargs):
+            result, served_stale = self._call_backend(method, args, kwargs, idempotent, serve_stale)
+            return (result, served_stale) if include_staleness else result
+        return wrapper
+    return decorator
 
 class ChallengeDatabase:
     def __init__(self):
+        """Create the database wrapper; call connect() before using it"""
+        self.db = None
+        # When the call running on this thread has to finish, set by _call_backend
+        self._call_deadline = threading.local()
+        self._breaker = CircuitBreaker(
+            failure_threshold=config.FIRESTORE_BREAKER_THRESHOLD,
+            reset_timeout=config.FIRESTORE_BREAKER_RESET
+        )
+        self._last_known = LastKnownCache()
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether connect() has completed"""
+        return self.db is not None
+
+    def connect(self):
         """Initialize Firebase connection and Firestore client"""
         try:
-            # Debug private key format
-            private_key = config.FIREBASE_PRIVATE_KEY
-            print(f"Private key starts with: {private_key[:50] if private_key else 'None'}...")
-            print(f"Private key ends with: ...{private_key[-50:] if private_key else 'None'}")
-            print(f"Private key length: {len(private_key) if private_key else 0}")
-            
-            # Initialize Firebase with service account
-            cred = credentials.Certificate({
-                "type": "service_account",
-                "project_id": config.FIREBASE_PROJECT_ID,
-                "private_key_id": config.FIREBASE_PRIVATE_KEY_ID,
-                "private_key": private_key,
-                "client_email": config.FIREBASE_CLIENT_EMAIL,
-                "client_id": config.FIREBASE_CLIENT_ID,
-                "auth_uri": config.FIREBASE_AUTH_URI,
-                "token_uri": config.FIREBASE_TOKEN_URI,
-                "auth_provider_x509_cert_url": config.FIREBASE_AUTH_PROVIDER_X509_CERT_URL,
-                "client_x509_cert_url": config.FIREBASE_CLIENT_X509_CERT_URL
-            })
+            _import_firebase()
+            from firebase_admin import credentials
             
-            firebase_admin.initialize_app(cred)
+            # A previous attempt may have initialized the app before failing
+            try:
+                firebase_admin.get_app()
+            except ValueError:
+                # Initialize Firebase with service account
+                cred = credentials.Certificate({
+                    "type": "service_account",
+                    "project_id": config.FIREBASE_PROJECT_ID,
+                    "private_key_id": config.FIREBASE_PRIVATE_KEY_ID,
+                    "private_key": config.FIREBASE_PRIVATE_KEY,
+                    "client_email": config.FIREBASE_CLIENT_EMAIL,
+                    "client_id": config.FIREBASE_CLIENT_ID,
+                    "auth_uri": config.FIREBASE_AUTH_URI,
+                    "token_uri": config.FIREBASE_TOKEN_URI,
+                    "auth_provider_x509_cert_url": config.FIREBASE_AUTH_PROVIDER_X509_CERT_URL,
+                    "client_x509_cert_url": config.FIREBASE_CLIENT_X509_CERT_URL
+                })
+                firebase_admin.initialize_app(cred)
+                
             self.db = firestore.client()
             print("Firebase connection established successfully!")
             
@@ -36,8 +105,202 @@ class ChallengeDatabase:
             print(f"Error initializing Firebase: {e}")
             raise
 
-    def create_challenge(self, challenger_id: int, challenger_name: str, 
-                        opponent_id: int, opponent_name: str, game: str) -> str:
+    def warm_up(self) -> bool:
+        """Issue a tiny read so the gRPC channel and auth token are ready before the first real query"""
+        try:
+            self.db.collection('challenges').limit(1).get(**self._rpc_options)
+            return True
+            
+        except Exception as e:
+            print(f"Error warming up Firestore: {e}")
+            return False
+
+    @property
+    def _rpc_options(self) -> Dict:
+        """Retry and timeout options for a Firestore RPC.
+        
+        The timeout is cut down to whatever is left of the current call's
+        deadline, so a call making several RPCs can't overrun it."""
+        timeout = config.FIRESTORE_CALL_TIMEOUT
+        deadline = getattr(self._call_deadline, 'at', None)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("The database call ran out of time")
+            timeout = min(timeout, remaining)
+        return {'retry': None, 'timeout': timeout}
+
+    def _call_backend(self, method, args, kwargs, idempotent: bool, serve_stale: bool) -> Tuple[object, bool]:
+        """Run a database method with retries, the circuit breaker and the last-known cache.
+        
+        Returns the result and whether it came from the cache."""
+        cache_key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        
+        if not self._breaker.allow_request():
+            cached = self._last_known.get(cache_key, _MISSING) if serve_stale else _MISSING
+            if cached is not _MISSING:
+                return cached, True
+            raise CircuitOpenError("The database is currently unavailable, so the bot is in read-only mode. Please try again later.")
+            
+        def attempt(remaining: float):
+            self._call_deadline.at = time.monotonic() + remaining
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._call_deadline.at = None
+                
+        try:
+            result = retry_call(
+                attempt,
+                attempts=config.FIRESTORE_READ_ATTEMPTS if idempotent else 1,
+                base_delay=config.FIRESTORE_RETRY_BASE_DELAY,
+                max_delay=config.FIRESTORE_RETRY_MAX_DELAY,
+                deadline=config.FIRESTORE_CALL_DEADLINE,
+                is_retryable=_is_transient_error
+            )
+        except Exception as e:
+            if not _is_transient_error(e):
+                # The backend answered, it just didn't like the request
+                self._breaker.record_success()
+                raise
+            self._breaker.record_failure()
+            cached = self._last_known.get(cache_key, _MISSING) if serve_stale else _MISSING
+            if cached is not _MISSING:
+                return cached, True
+            raise
+            
+        self._breaker.record_success()
+        if serve_stale:
+            self._last_known.put(cache_key, result)
+        return result, False
+
+    def _run_transaction(self, func):
+        """Run func(transaction) in a read-write transaction, retrying it if it's aborted by contention.
+        
+        Does what @firestore.transactional does, but also gives the begin,
+        commit and rollback RPCs _rpc_options. The decorator leaves those on the
+        client's default retry and timeout, which during an outage far outlast
+        the call's deadline."""
+        from google.api_core import exceptions as api_exceptions
+        api = self.db._firestore_api
+        metadata = self.db._rpc_metadata
+        database = self.db._database_string
+        transaction = self.db.transaction()
+        retry_id = None
+        aborted = None
+        
+        for _ in range(_TRANSACTION_ATTEMPTS):
+            response = api.begin_transaction(
+                request={'database': database, 'options': transaction._options_protobuf(retry_id)},
+                metadata=metadata,
+                **self._rpc_options
+            )
+            transaction._id = response.transaction
+            # Retries name the first attempt so they keep its place in line
+            retry_id = retry_id or transaction._id
+            try:
+                result = func(transaction)
+                api.commit(
+                    request={'database': database, 'writes': transaction._write_pbs, 'transaction': transaction._id},
+                    metadata=metadata,
+                    **self._rpc_options
+                )
+                return result
+            except api_exceptions.Aborted as e:
+                aborted = e
+            except Exception:
+                try:
+                    api.rollback(request={'database': database, 'transaction': transaction._id},
+                                 metadata=metadata, **self._rpc_options)
+                except Exception as rollback_error:
+                    print(f"Error rolling back transaction: {rollback_error}")
+                raise
+            finally:
+                transaction._clean_up()
+                
+        raise aborted
+
+    @staticmethod
+    def _stats_doc_id(guild_id: int, player_id: int, game: str) -> str:
+        """Build the player_stats document ID, partitioned by guild"""
+        return f"{guild_id}_{player_id}_{game}"
+
+    def _get_guild_challenge(self, guild_id: int, challenge_id: str, transaction=None):
+        """Fetch a challenge document, returning None if it doesn't exist or belongs to another guild"""
+        challenge_ref = self.db.collection('challenges').document(challenge_id)
+        challenge = challenge_ref.get(transaction=transaction, **self._rpc_options)
+        
+        if not challenge.exists:
+            return None, None
+            
+        challenge_data = challenge.to_dict()
+        if challenge_data.get('discord_guild_id') != guild_id:
+            return None, None
+            
+        return challenge_ref, challenge_data
+
+    def _user_ref(self, player_id: int):
+        """Reference to a player's users document"""
+        return self.db.collection('users').document(str(player_id))
+
+    @staticmethod
+    def _open_challenge_entries(challenge_data: Dict, status: str) -> List[Tuple[int, str, Dict]]:
+        """Build the open_challenges entry each player keeps for a challenge, as (player_id, player_name, entry)"""
+        sides = (
+            (challenge_data['challenger_id'], challenge_data['challenger_name'],
+             challenge_data['opponent_id'], challenge_data['opponent_name'], True),
+            (challenge_data['opponent_id'], challenge_data['opponent_name'],
+             challenge_data['challenger_id'], challenge_data['challenger_name'], False)
+        )
+        return [
+            (player_id, player_name, {
+                'discord_guild_id': challenge_data.get('discord_guild_id'),
+                'game': challenge_data['game'],
+                'status': status,
+                'opponent_id': opponent_id,
+                'opponent_name': opponent_name,
+                'is_challenger': is_challenger
+            })
+            for player_id, player_name, opponent_id, opponent_name, is_challenger in sides
+        ]
+
+    def _write_open_challenge(self, writer, challenge_id: str, challenge_data: Dict, status: str):
+        """Add or update a challenge in both players' open_challenges summaries.
+        
+        writer is the batch or transaction that writes the challenge itself, so
+        the summaries can never disagree with it."""
+        for player_id, player_name, entry in self._open_challenge_entries(challenge_data, status):
+            writer.set(self._user_ref(player_id), {
+                'player_id': player_id,
+                'player_name': player_name,
+                'open_challenges': {challenge_id: entry}
+            }, merge=True)
+
+    def _remove_open_challenges(self, writer, player_id: int, challenge_ids: List[str]):
+        """Drop finished challenges from a player's open_challenges summary"""
+        writer.set(self._user_ref(player_id), {
+            'open_challenges': {challenge_id: firestore.DELETE_FIELD for challenge_id in challenge_ids}
+        }, merge=True)
+
+    def _write_stats_delta(self, writer, guild_id: int, player_id: int, player_name: str, game: str,
+                           wins: int, losses: int, draws: int, total_games: int):
+        """Add to a player's stats for a game, creating the document if needed"""
+        stats_ref = self.db.collection('player_stats').document(self._stats_doc_id(guild_id, player_id, game))
+        writer.set(stats_ref, {
+            'discord_guild_id': guild_id,
+            'player_id': player_id,
+            'player_name': player_name,  # Update name in case it changed
+            'game': game,
+            'wins': firestore.Increment(wins),
+            'losses': firestore.Increment(losses),
+            'draws': firestore.Increment(draws),
+            'total_games': firestore.Increment(total_games)
+        }, merge=True)
+
+    @_backend_call()
+    def create_challenge(self, guild_id: int, challenger_id: int, challenger_name: str, 
+                        opponent_id: int, opponent_name: str, game: str,
+                        channel_id: Optional[int] = None) -> str:
         """Create a new challenge in the database"""
         try:
             challenge_data = {
@@ -52,339 +315,747 @@ class ChallengeDatabase:
                 "loser_id": None,
                 "created_at": datetime.now(),
                 "accepted_at": None,
-                "completed_at": None
+                "completed_at": None,
+                "discord_guild_id": guild_id,
+                "discord_channel_id": channel_id
             }
             
-            doc_ref = self.db.collection('challenges').add(challenge_data)
-            return doc_ref[1].id
+            # The challenge and both players' summaries are written together
+            challenge_ref = self.db.collection('challenges').document()
+            batch = self.db.batch()
+            batch.set(challenge_ref, challenge_data)
+            self._write_open_challenge(batch, challenge_ref.id, challenge_data, 'pending')
+            batch.commit(**self._rpc_options)
+            return challenge_ref.id
             
         except Exception as e:
             print(f"Error creating challenge: {e}")
             raise
 
-    def get_pending_challenges_for_user(self, user_id: int) -> List[Dict]:
+    @_backend_call(idempotent=True)
+    def get_pending_challenges_for_user(self, guild_id: int, user_id: int) -> List[Challenge]:
         """Get all pending challenges for a specific user (both as challenger and opponent)"""
         try:
             # Get challenges where user is the opponent
             opponent_challenges = self.db.collection('challenges').where(
+                filter=firestore.FieldFilter('discord_guild_id', '==', guild_id)
+            ).where(
                 filter=firestore.FieldFilter('opponent_id', '==', user_id)
             ).where(
                 filter=firestore.FieldFilter('status', '==', 'pending')
-            ).stream()
+            ).stream(**self._rpc_options)
             
             # Get challenges where user is the challenger
             challenger_challenges = self.db.collection('challenges').where(
+                filter=firestore.FieldFilter('discord_guild_id', '==', guild_id)
+            ).where(
                 filter=firestore.FieldFilter('challenger_id', '==', user_id)
             ).where(
                 filter=firestore.FieldFilter('status', '==', 'pending')
-            ).stream()
+            ).stream(**self._rpc_options)
             
             all_challenges = []
             
             for doc in opponent_challenges:
-                all_challenges.append({"id": doc.id, **doc.to_dict()})
+                all_challenges.append(Challenge.from_dict(doc.id, doc.to_dict()))
                 
             for doc in challenger_challenges:
-                all_challenges.append({"id": doc.id, **doc.to_dict()})
+                all_challenges.append(Challenge.from_dict(doc.id, doc.to_dict()))
                 
             return all_challenges
             
         except Exception as e:
             print(f"Error getting pending challenges: {e}")
-            return []
+            raise
 
-    def accept_challenge(self, challenge_id: str, accepted_by_id: int) -> bool:
+    @_backend_call()
+    def accept_challenge(self, guild_id: int, challenge_id: str, accepted_by_id: int) -> bool:
         """Accept a challenge"""
         try:
-            challenge_ref = self.db.collection('challenges').document(challenge_id)
-            challenge = challenge_ref.get()
-            
-            if not challenge.exists:
-                return False
+            def accept(transaction):
+                challenge_ref, challenge_data = self._get_guild_challenge(guild_id, challenge_id, transaction)
                 
-            challenge_data = challenge.to_dict()
-            if challenge_data['opponent_id'] != accepted_by_id:
-                return False
+                if not challenge_ref:
+                    return False
+                    
+                if challenge_data['opponent_id'] != accepted_by_id:
+                    return False
+                    
+                if challenge_data['status'] != 'pending':
+                    return False
+                    
+                transaction.update(challenge_ref, {
+                    'status': 'accepted',
+                    'accepted_at': datetime.now()
+                })
+                self._write_open_challenge(transaction, challenge_id, challenge_data, 'accepted')
+                return True
                 
-            challenge_ref.update({
-                'status': 'accepted',
-                'accepted_at': datetime.now()
-            })
-            return True
+            return self._run_transaction(accept)
             
         except Exception as e:
             print(f"Error accepting challenge: {e}")
-            return False
+            raise
 
-    def report_result(self, challenge_id: str, reporter_id: int, 
+    @_backend_call()
+    def report_result(self, guild_id: int, challenge_id: str, reporter_id: int, 
                      result: str, winner_id: int = None, loser_id: int = None) -> bool:
-        """Report the result of a completed game"""
+        """Report the result of a completed game.
+        
+        The challenge, both players' stats and their open challenge summaries
+        are updated in one transaction."""
         try:
-            challenge_ref = self.db.collection('challenges').document(challenge_id)
-            challenge = challenge_ref.get()
-            
-            if not challenge.exists:
-                return False
+            def report(transaction):
+                challenge_ref, challenge_data = self._get_guild_challenge(guild_id, challenge_id, transaction)
                 
-            challenge_data = challenge.to_dict()
-            if challenge_data['status'] != 'accepted':
-                return False
+                if not challenge_ref:
+                    return False
+                    
+                if challenge_data['status'] != 'accepted':
+                    return False
+                    
+                if reporter_id not in [challenge_data['challenger_id'], challenge_data['opponent_id']]:
+                    return False
+                    
+                # Update challenge with result
+                update_data = {
+                    'status': 'completed',
+                    'result': result,
+                    'completed_at': datetime.now()
+                }
                 
-            if reporter_id not in [challenge_data['challenger_id'], challenge_data['opponent_id']]:
-                return False
+                if result in ['win', 'loss']:
+                    update_data['winner_id'] = winner_id
+                    update_data['loser_id'] = loser_id
+                    
+                transaction.update(challenge_ref, update_data)
                 
-            # Update challenge with result
-            update_data = {
-                'status': 'completed',
-                'result': result,
-                'completed_at': datetime.now()
-            }
-            
-            if result in ['win', 'loss']:
-                update_data['winner_id'] = winner_id
-                update_data['loser_id'] = loser_id
+                # Update player statistics
+                players = {
+                    challenge_data['challenger_id']: challenge_data['challenger_name'],
+                    challenge_data['opponent_id']: challenge_data['opponent_name']
+                }
+                game = challenge_data['game']
+                if result == 'draw':
+                    # Handle draw - both players get a draw recorded
+                    for player_id, player_name in players.items():
+                        self._write_stats_delta(transaction, guild_id, player_id, player_name, game, 0, 0, 1, 1)
+                else:
+                    # Update winner stats
+                    if winner_id:
+                        winner_name = players.get(winner_id, challenge_data['opponent_name'])
+                        self._write_stats_delta(transaction, guild_id, winner_id, winner_name, game, 1, 0, 0, 1)
+                    
+                    # Update loser stats
+                    if loser_id:
+                        loser_name = players.get(loser_id, challenge_data['opponent_name'])
+                        self._write_stats_delta(transaction, guild_id, loser_id, loser_name, game, 0, 1, 0, 1)
+                        
+                for player_id in players:
+                    self._remove_open_challenges(transaction, player_id, [challenge_id])
+                return True
                 
-            challenge_ref.update(update_data)
-            
-            # Update player statistics
-            self._update_player_stats(
-                challenge_data['game'], 
-                challenge_data['challenger_id'], 
-                challenge_data['challenger_name'],
-                challenge_data['opponent_id'],
-                challenge_data['opponent_name'],
-                winner_id, 
-                loser_id, 
-                result
-            )
-            
-            return True
+            return self._run_transaction(report)
             
         except Exception as e:
             print(f"Error reporting result: {e}")
-            return False
+            raise
 
-    def _update_player_stats(self, game: str, challenger_id: int, challenger_name: str,
-                           opponent_id: int, opponent_name: str, winner_id: int, loser_id: int, result: str):
-        """Update player statistics for a game"""
-        try:
-            if result == 'draw':
-                # Handle draw - both players get a draw recorded
-                self._update_single_player_stats(challenger_id, challenger_name, game, 0, 0, 1)
-                self._update_single_player_stats(opponent_id, opponent_name, game, 0, 0, 1)
-                return
-            
-            # Update winner stats
-            if winner_id:
-                winner_name = challenger_name if winner_id == challenger_id else opponent_name
-                self._update_single_player_stats(winner_id, winner_name, game, 1, 0, 0)
-            
-            # Update loser stats
-            if loser_id:
-                loser_name = challenger_name if loser_id == challenger_id else opponent_name
-                self._update_single_player_stats(loser_id, loser_name, game, 0, 1, 0)
-                    
-        except Exception as e:
-            print(f"Error updating player stats: {e}")
+    @staticmethod
+    def _has_outcome(challenge_data: Dict, winner_id: Optional[int]) -> bool:
+        """Whether a completed challenge's recorded result matches winner_id (None for a draw)"""
+        if winner_id is None:
+            return challenge_data.get('result') == 'draw'
+        return challenge_data.get('result') in ('win', 'loss') and challenge_data.get('winner_id') == winner_id
 
-    def _update_single_player_stats(self, player_id: int, player_name: str, game: str, wins: int, losses: int, draws: int):
-        """Update stats for a single player"""
+    @_backend_call()
+    def report_results_batch(self, guild_id: int, reporter_id: int,
+                             results: List[Tuple[str, Optional[int]]]) -> Tuple[int, int, List[str], List[str]]:
+        """Report many results at once, e.g. after a tournament round.
+        
+        results holds (challenge_id, winner_id) pairs, with winner_id None for a
+        draw. Every entry is validated before anything is written; if any fail,
+        nothing is applied and the errors are returned. Otherwise the challenge
+        updates and aggregated stat increments are committed in chunked batches.
+        
+        Challenges already completed with the same outcome are skipped rather
+        than rejected, so a list whose later chunks failed can be sent again.
+        Returns the number of results applied, the number skipped, the list of
+        errors and the IDs of any tournaments the results belonged to."""
         try:
-            stats_ref = self.db.collection('player_stats').document(f"{player_id}_{game}")
-            stats = stats_ref.get()
-            
-            if stats.exists:
-                data = stats.to_dict()
-                data['wins'] = data.get('wins', 0) + wins
-                data['losses'] = data.get('losses', 0) + losses
-                data['draws'] = data.get('draws', 0) + draws
-                data['total_games'] = data.get('total_games', 0) + 1
-                data['player_name'] = player_name  # Update name in case it changed
-                stats_ref.update(data)
-            else:
-                stats_ref.set({
-                    'player_id': player_id,
-                    'player_name': player_name,
-                    'game': game,
-                    'wins': wins,
-                    'losses': losses,
-                    'draws': draws,
-                    'total_games': 1
-                })
+            errors = []
+            seen = set()
+            for challenge_id, _ in results:
+                if challenge_id in seen:
+                    errors.append(f"{challenge_id}: listed more than once")
+                seen.add(challenge_id)
+            if errors:
+                return 0, 0, errors, []
+                
+            # One batched read for every challenge instead of a query per result
+            refs = [self.db.collection('challenges').document(challenge_id) for challenge_id, _ in results]
+            snapshots = {snapshot.id: snapshot for snapshot in self.db.get_all(refs, **self._rpc_options)}
+            
+            validated = []
+            already_recorded = []
+            for challenge_id, winner_id in results:
+                snapshot = snapshots.get(challenge_id)
+                if snapshot is None or not snapshot.exists:
+                    errors.append(f"{challenge_id}: challenge not found")
+                    continue
+                    
+                data = snapshot.to_dict()
+                if data.get('discord_guild_id') != guild_id:
+                    errors.append(f"{challenge_id}: challenge not found")
+                    continue
+                if data['status'] == 'completed' and self._has_outcome(data, winner_id):
+                    already_recorded.append(data)
+                    continue
+                if data['status'] != 'accepted':
+                    errors.append(f"{challenge_id}: challenge is {data['status']}, not accepted")
+                    continue
+                    
+                players = [data['challenger_id'], data['opponent_id']]
+                if winner_id is not None and winner_id not in players:
+                    errors.append(f"{challenge_id}: winner {winner_id} is not part of this challenge")
+                    continue
+                    
+                validated.append((snapshot, data, winner_id))
+                
+            if errors:
+                return 0, 0, errors, []
+                
+            # Each challenge adds at most five writes (itself, two stats docs and two
+            # users docs), so this keeps every batch under Firestore's 500 write limit.
+            # Stat deltas and summary removals are aggregated per chunk so each batch
+            # is self-consistent if a later one fails.
+            chunk_size = config.BATCH_REPORT_CHUNK_SIZE
+            for start in range(0, len(validated), chunk_size):
+                batch = self.db.batch()
+                stat_deltas = {}
+                closed_challenges = {}
+                completed_at = datetime.now()
                 
+                for snapshot, data, winner_id in validated[start:start + chunk_size]:
+                    players = {
+                        data['challenger_id']: data['challenger_name'],
+                        data['opponent_id']: data['opponent_name']
+                    }
+                    
+                    if winner_id is None:
+                        update_data = {'status': 'completed', 'result': 'draw', 'completed_at': completed_at,
+                                       'reported_by': reporter_id}
+                    else:
+                        loser_id = next(player_id for player_id in players if player_id != winner_id)
+                        update_data = {'status': 'completed', 'result': 'win', 'completed_at': completed_at,
+                                       'winner_id': winner_id, 'loser_id': loser_id, 'reported_by': reporter_id}
+                        
+                    # Fails the whole batch if the challenge changed since it was validated
+                    batch.update(snapshot.reference, update_data,
+                                 option=self.db.write_option(last_update_time=snapshot.update_time))
+                    
+                    for player_id, player_name in players.items():
+                        closed_challenges.setdefault(player_id, []).append(snapshot.id)
+                        delta = stat_deltas.setdefault((player_id, data['game']), {
+                            'player_name': player_name, 'wins': 0, 'losses': 0, 'draws': 0, 'total_games': 0
+                        })
+                        delta['player_name'] = player_name
+                        delta['total_games'] += 1
+                        if winner_id is None:
+                            delta['draws'] += 1
+                        elif player_id == winner_id:
+                            delta['wins'] += 1
+                        else:
+                            delta['losses'] += 1
+                            
+                for (player_id, game), delta in stat_deltas.items():
+                    self._write_stats_delta(batch, guild_id, player_id, delta['player_name'], game,
+                                            delta['wins'], delta['losses'], delta['draws'], delta['total_games'])
+                    
+                for player_id, challenge_ids in closed_challenges.items():
+                    self._remove_open_challenges(batch, player_id, challenge_ids)
+                    
+                batch.commit(**self._rpc_options)
+                
+            # Skipped results still count, since their round may not have been advanced
+            reported = [data for _, data, _ in validated] + already_recorded
+            tournament_ids = sorted({data['tournament_id'] for data in reported if data.get('tournament_id')})
+            return len(validated), len(already_recorded), [], tournament_ids
+            
         except Exception as e:
-            print(f"Error updating single player stats: {e}")
+            print(f"Error reporting batch results: {e}")
+            raise
 
-    def get_leaderboard(self, game: str, limit: int = 10) -> List[Dict]:
+    @_backend_call(idempotent=True, serve_stale=True)
+    def get_leaderboard(self, guild_id: int, game: str, limit: int = 10) -> List[PlayerStats]:
         """Get leaderboard for a specific game"""
         try:
             stats = self.db.collection('player_stats').where(
-                'game', '==', game
-            ).order_by('wins', direction=firestore.Query.DESCENDING).limit(limit).stream()
+                filter=firestore.FieldFilter('discord_guild_id', '==', guild_id)
+            ).where(
+                filter=firestore.FieldFilter('game', '==', game)
+            ).order_by('wins', direction=firestore.Query.DESCENDING).limit(limit).stream(**self._rpc_options)
             
-            leaderboard = []
-            for doc in stats:
-                data = doc.to_dict()
-                win_rate = (data['wins'] / data['total_games']) * 100 if data['total_games'] > 0 else 0
-                leaderboard.append({
-                    **data,
-                    'win_rate': round(win_rate, 1)
-                })
-                
-            return leaderboard
+            return [PlayerStats.from_dict(doc.to_dict()) for doc in stats]
             
         except Exception as e:
             print(f"Error getting leaderboard: {e}")
-            return []
+            raise
 
-    def get_overall_leaderboard(self, limit: int = 10) -> List[Dict]:
+    @_backend_call(idempotent=True, serve_stale=True)
+    def get_overall_leaderboard(self, guild_id: int, limit: int = 10) -> List[PlayerTotals]:
         """Get overall leaderboard aggregated across all games with breakdown"""
         try:
-            # Get all player stats
-            all_stats = self.db.collection('player_stats').stream()
+            # Get all player stats for this guild
+            all_stats = self.db.collection('player_stats').where(
+                filter=firestore.FieldFilter('discord_guild_id', '==', guild_id)
+            ).stream(**self._rpc_options)
             
             # Aggregate stats by player
             player_totals = {}
             for doc in all_stats:
-                data = doc.to_dict()
-                player_id = data['player_id']
-                player_name = data.get('player_name', f"Player #{player_id}")
-                game = data['game']
+                stats = PlayerStats.from_dict(doc.to_dict())
                 
-                if player_id not in player_totals:
-                    player_totals[player_id] = {
-                        'player_id': player_id,
-                        'player_name': player_name,
-                        'wins': 0,
-                        'losses': 0,
-                        'draws': 0,
-                        'total_games': 0,
-                        'games': {}  # Store individual game stats
-                    }
-                
-                # Store individual game stats
-                player_totals[player_id]['games'][game] = {
-                    'wins': data.get('wins', 0),
-                    'losses': data.get('losses', 0),
-                    'draws': data.get('draws', 0),
-                    'total_games': data.get('total_games', 0)
-                }
+                if stats.player_id not in player_totals:
+                    player_totals[stats.player_id] = PlayerTotals(guild_id, stats.player_id, stats.player_name)
                 
-                # Add this game's stats to the total
-                player_totals[player_id]['wins'] += data.get('wins', 0)
-                player_totals[player_id]['losses'] += data.get('losses', 0)
-                player_totals[player_id]['draws'] += data.get('draws', 0)
-                player_totals[player_id]['total_games'] += data.get('total_games', 0)
-            
-            # Convert to list and calculate win rates
-            leaderboard = []
-            for player_data in player_totals.values():
-                if player_data['total_games'] > 0:  # Only include players with games
-                    win_rate = (player_data['wins'] / player_data['total_games']) * 100
-                    player_data['win_rate'] = round(win_rate, 1)
-                    leaderboard.append(player_data)
+                # Add this game's stats to the total, keeping it for the breakdown
+                player_totals[stats.player_id].add(stats)
+            
+            # Only include players with games
+            leaderboard = [player for player in player_totals.values() if player.total_games > 0]
             
             # Sort by wins (descending), then by win rate (descending)
-            leaderboard.sort(key=lambda x: (x['wins'], x['win_rate']), reverse=True)
+            leaderboard.sort(key=lambda player: (player.wins, player.win_rate), reverse=True)
             
             return leaderboard[:limit]
             
         except Exception as e:
             print(f"Error getting overall leaderboard: {e}")
-            return []
+            raise
 
-    def get_user_stats(self, user_id: int, game: str = None) -> Dict:
+    @_backend_call(idempotent=True, serve_stale=True)
+    def get_user_stats(self, guild_id: int, user_id: int, game: str = None) -> Union[PlayerStats, Dict[str, PlayerStats]]:
         """Get statistics for a specific user"""
         try:
             if game:
                 # Get stats for specific game
-                stats_ref = self.db.collection('player_stats').document(f"{user_id}_{game}")
-                stats = stats_ref.get()
+                stats_ref = self.db.collection('player_stats').document(self._stats_doc_id(guild_id, user_id, game))
+                stats = stats_ref.get(**self._rpc_options)
                 
                 if stats.exists:
-                    data = stats.to_dict()
-                    win_rate = (data['wins'] / data['total_games']) * 100 if data['total_games'] > 0 else 0
-                    return {**data, 'win_rate': round(win_rate, 1)}
+                    return PlayerStats.from_dict(stats.to_dict())
                 else:
-                    return {
-                        'player_id': user_id,
-                        'game': game,
-                        'wins': 0,
-                        'losses': 0,
-                        'draws': 0,
-                        'total_games': 0,
-                        'win_rate': 0
-                    }
+                    return PlayerStats(guild_id, user_id, f"Player #{user_id}", game)
             else:
                 # Get stats for all games
                 stats = self.db.collection('player_stats').where(
-                    'player_id', '==', user_id
-                ).stream()
+                    filter=firestore.FieldFilter('discord_guild_id', '==', guild_id)
+                ).where(
+                    filter=firestore.FieldFilter('player_id', '==', user_id)
+                ).stream(**self._rpc_options)
                 
                 all_stats = {}
                 for doc in stats:
-                    data = doc.to_dict()
-                    game_name = data['game']
-                    win_rate = (data['wins'] / data['total_games']) * 100 if data['total_games'] > 0 else 0
-                    all_stats[game_name] = {**data, 'win_rate': round(win_rate, 1)}
+                    game_stats = PlayerStats.from_dict(doc.to_dict())
+                    all_stats[game_stats.game] = game_stats
                     
                 return all_stats
                 
         except Exception as e:
             print(f"Error getting user stats: {e}")
-            return {}
+            raise
 
-    def get_active_challenges(self, user_id: int) -> List[Dict]:
+    @_backend_call(idempotent=True)
+    def get_active_challenges(self, guild_id: int, user_id: int) -> List[Challenge]:
         """Get all active challenges for a user (accepted but not completed)"""
         try:
             challenges = self.db.collection('challenges').where(
+                filter=firestore.FieldFilter('discord_guild_id', '==', guild_id)
+            ).where(
                 filter=firestore.FieldFilter('status', '==', 'accepted')
             ).where(
                 filter=firestore.FieldFilter('challenger_id', '==', user_id)
-            ).stream()
+            ).stream(**self._rpc_options)
             
             opponent_challenges = self.db.collection('challenges').where(
+                filter=firestore.FieldFilter('discord_guild_id', '==', guild_id)
+            ).where(
                 filter=firestore.FieldFilter('status', '==', 'accepted')
             ).where(
                 filter=firestore.FieldFilter('opponent_id', '==', user_id)
-            ).stream()
+            ).stream(**self._rpc_options)
             
             active_challenges = []
             
             for doc in challenges:
-                active_challenges.append({"id": doc.id, **doc.to_dict()})
+                active_challenges.append(Challenge.from_dict(doc.id, doc.to_dict()))
                 
             for doc in opponent_challenges:
-                active_challenges.append({"id": doc.id, **doc.to_dict()})
+                active_challenges.append(Challenge.from_dict(doc.id, doc.to_dict()))
                 
             return active_challenges
             
         except Exception as e:
             print(f"Error getting active challenges: {e}")
-            return []
+            raise
 
-    def cancel_challenge(self, challenge_id: str, user_id: int) -> bool:
-        """Cancel a challenge (only challenger can cancel)"""
+    @_backend_call(idempotent=True)
+    def get_open_challenges(self, guild_id: int, user_id: int) -> List[OpenChallenge]:
+        """Get a user's pending and accepted challenges from their users document in a single read"""
         try:
-            challenge_ref = self.db.collection('challenges').document(challenge_id)
-            challenge = challenge_ref.get()
+            snapshot = self._user_ref(user_id).get(**self._rpc_options)
             
-            if not challenge.exists:
-                return False
+            if not snapshot.exists:
+                return []
                 
-            challenge_data = challenge.to_dict()
-            if challenge_data['challenger_id'] != user_id:
-                return False
+            open_challenges = snapshot.to_dict().get('open_challenges') or {}
+            return [
+                OpenChallenge.from_dict(challenge_id, data)
+                for challenge_id, data in sorted(open_challenges.items())
+                if data.get('discord_guild_id') == guild_id
+            ]
+            
+        except Exception as e:
+            print(f"Error getting open challenges: {e}")
+            raise
+
+    @_backend_call()
+    def cancel_challenge(self, guild_id: int, challenge_id: str, user_id: int) -> bool:
+        """Cancel a challenge (only challenger can cancel)"""
+        try:
+            def cancel(transaction):
+                challenge_ref, challenge_data = self._get_guild_challenge(guild_id, challenge_id, transaction)
                 
-            if challenge_data['status'] != 'pending':
-                return False
+                if not challenge_ref:
+                    return False
+                    
+                if challenge_data['challenger_id'] != user_id:
+                    return False
+                    
+                if challenge_data['status'] != 'pending':
+                    return False
+                    
+                transaction.update(challenge_ref, {
+                    'status': 'cancelled',
+                    'completed_at': datetime.now()
+                })
+                for player_id in (challenge_data['challenger_id'], challenge_data['opponent_id']):
+                    self._remove_open_challenges(transaction, player_id, [challenge_id])
+                return True
                 
-            challenge_ref.update({
-                'status': 'cancelled',
-                'completed_at': datetime.now()
-            })
-            return True
+            return self._run_transaction(cancel)
             
         except Exception as e:
             print(f"Error cancelling challenge: {e}")
-            return False
+            raise
+
+    def _write_tournament_round(self, writer, guild_id: int, tournament_ref, tournament_data: Dict,
+                                round_number: int) -> Dict:
+        """Pair the next round and add its challenges to writer (a batch or transaction).
+        
+        Updates tournament_data in place with the new round's byes and opponents
+        and returns a summary of the round."""
+        players = {player['player_id']: player['player_name'] for player in tournament_data['players']}
+        player_ids = [player['player_id'] for player in tournament_data['players']]
+        scores = {int(player_id): score for player_id, score in tournament_data['scores'].items()}
+        opponents = {int(player_id): set(met) for player_id, met in tournament_data['opponents'].items()}
+        byes = set(tournament_data['byes'])
+        
+        # Round robin pairings are fixed by the player order, so only Swiss
+        # needs to remember who has met whom
+        track_opponents = tournament_data['format'] == tournament.SWISS
+        if tournament_data['format'] == tournament.ROUND_ROBIN:
+            pairings, bye = tournament.round_robin_pairings(player_ids, round_number - 1)
+        else:
+            seeds = {player['player_id']: player.get('seed', 0) for player in tournament_data['players']}
+            pairings, bye = tournament.swiss_pairings(player_ids, scores, seeds, opponents, byes)
+            
+        now = datetime.now()
+        round_challenges = []
+        for challenger_id, opponent_id in pairings:
+            challenge_ref = self.db.collection('challenges').document()
+            challenge_data = {
+                "challenger_id": challenger_id,
+                "challenger_name": players[challenger_id],
+                "opponent_id": opponent_id,
+                "opponent_name": players[opponent_id],
+                "game": tournament_data['game'],
+                # Tournament games are scheduled by the organizer, so there's nothing to accept
+                "status": "accepted",
+                "result": None,
+                "winner_id": None,
+                "loser_id": None,
+                "created_at": now,
+                "accepted_at": now,
+                "completed_at": None,
+                "discord_guild_id": guild_id,
+                "discord_channel_id": tournament_data.get('discord_channel_id'),
+                "tournament_id": tournament_ref.id,
+                "tournament_round": round_number
+            }
+            writer.set(challenge_ref, challenge_data)
+            self._write_open_challenge(writer, challenge_ref.id, challenge_data, 'accepted')
+            if track_opponents:
+                opponents.setdefault(challenger_id, set()).add(opponent_id)
+                opponents.setdefault(opponent_id, set()).add(challenger_id)
+            round_challenges.append({
+                'id': challenge_ref.id,
+                'challenger_name': players[challenger_id],
+                'opponent_name': players[opponent_id]
+            })
+            
+        if bye is not None:
+            byes.add(bye)
+            scores[bye] = scores.get(bye, 0) + tournament.BYE_POINTS
+            
+        tournament_data['current_round'] = round_number
+        tournament_data['scores'] = {str(player_id): score for player_id, score in scores.items()}
+        tournament_data['opponents'] = {str(player_id): sorted(met) for player_id, met in opponents.items()}
+        tournament_data['byes'] = sorted(byes)
+        
+        return {
+            'round': round_number,
+            'challenges': round_challenges,
+            'bye': players[bye] if bye is not None else None
+        }
+
+    def _tournament_summary(self, tournament_id: str, tournament_data: Dict, round_info: Optional[Dict] = None) -> Dict:
+        """Build the dict the cog displays for a tournament"""
+        players = {player['player_id']: player['player_name'] for player in tournament_data['players']}
+        standings = sorted(
+            ({'player_id': int(player_id), 'player_name': players[int(player_id)], 'score': score}
+             for player_id, score in tournament_data['scores'].items()),
+            key=lambda standing: standing['score'],
+            reverse=True
+        )
+        return {
+            'id': tournament_id,
+            'name': tournament_data['name'],
+            'game': tournament_data['game'],
+            'format': tournament_data['format'],
+            'status': tournament_data['status'],
+            'current_round': tournament_data['current_round'],
+            'total_rounds': tournament_data['total_rounds'],
+            'standings': standings,
+            'round': round_info
+        }
+
+    @_backend_call()
+    def create_tournament(self, guild_id: int, organizer_id: int, name: str, game: str, tournament_format: str,
+                          players: List[Tuple[int, str]], channel_id: Optional[int] = None) -> Dict:
+        """Create a tournament and the challenges for its first round in one batched write"""
+        try:
+            # Seed players by their record in this game so early Swiss rounds pair sensibly
+            stats_refs = [
+                self.db.collection('player_stats').document(self._stats_doc_id(guild_id, player_id, game))
+                for player_id, _ in players
+            ]
+            seeds = {}
+            for snapshot in self.db.get_all(stats_refs, **self._rpc_options):
+                if snapshot.exists:
+                    data = snapshot.to_dict()
+                    seeds[data['player_id']] = data.get('wins', 0) - data.get('losses', 0)
+                    
+            tournament_ref = self.db.collection('tournaments').document()
+            tournament_data = {
+                'discord_guild_id': guild_id,
+                'discord_channel_id': channel_id,
+                'organizer_id': organizer_id,
+                'name': name,
+                'game': game,
+                'format': tournament_format,
+                'status': 'active',
+                'players': [
+                    {'player_id': player_id, 'player_name': player_name, 'seed': seeds.get(player_id, 0)}
+                    for player_id, player_name in players
+                ],
+                'current_round': 0,
+                'total_rounds': tournament.total_rounds(tournament_format, len(players)),
+                'scores': {str(player_id): 0.0 for player_id, _ in players},
+                'opponents': {},
+                'byes': [],
+                'created_at': datetime.now(),
+                'completed_at': None
+            }
+            
+            batch = self.db.batch()
+            round_info = self._write_tournament_round(batch, guild_id, tournament_ref, tournament_data, 1)
+            batch.set(tournament_ref, tournament_data)
+            batch.commit(**self._rpc_options)
+            
+            return self._tournament_summary(tournament_ref.id, tournament_data, round_info)
+            
+        except Exception as e:
+            print(f"Error creating tournament: {e}")
+            raise
+
+    @_backend_call()
+    def advance_tournament(self, guild_id: int, tournament_id: str) -> Optional[Dict]:
+        """Score the current round and, once all its games are done, pair the next one.
+        
+        Runs in a transaction so two results arriving together can't both create
+        the next round. Returns None while the round is still in progress,
+        otherwise the tournament summary with the new round (or the final
+        standings if that was the last round)."""
+        try:
+            tournament_ref = self.db.collection('tournaments').document(tournament_id)
+            
+            def advance(transaction):
+                snapshot = tournament_ref.get(transaction=transaction, **self._rpc_options)
+                if not snapshot.exists:
+                    return None
+                    
+                tournament_data = snapshot.to_dict()
+                if tournament_data.get('discord_guild_id') != guild_id or tournament_data['status'] != 'active':
+                    return None
+                    
+                round_challenges = list(transaction.get(
+                    self.db.collection('challenges').where(
+                        filter=firestore.FieldFilter('tournament_id', '==', tournament_id)
+                    ).where(
+                        filter=firestore.FieldFilter('tournament_round', '==', tournament_data['current_round'])
+                    ),
+                    **self._rpc_options
+                ))
+                if any(doc.to_dict()['status'] not in ('completed', 'cancelled') for doc in round_challenges):
+                    return None
+                    
+                scores = tournament_data['scores']
+                for doc in round_challenges:
+                    challenge_data = doc.to_dict()
+                    if challenge_data['status'] != 'completed':
+                        continue
+                    for player_id in (challenge_data['challenger_id'], challenge_data['opponent_id']):
+                        scores[str(player_id)] = scores.get(str(player_id), 0) + tournament.round_points(
+                            challenge_data['result'], challenge_data['winner_id'], player_id
+                        )
+                        
+                round_info = None
+                if tournament_data['current_round'] >= tournament_data['total_rounds']:
+                    tournament_data['status'] = 'completed'
+                    tournament_data['completed_at'] = datetime.now()
+                else:
+                    round_info = self._write_tournament_round(
+                        transaction, guild_id, tournament_ref, tournament_data, tournament_data['current_round'] + 1
+                    )
+                    
+                transaction.set(tournament_ref, tournament_data)
+                return self._tournament_summary(tournament_id, tournament_data, round_info)
+                
+            return self._run_transaction(advance)
+            
+        except Exception as e:
+            print(f"Error advancing tournament: {e}")
+            raise
+
+    @_backend_call(idempotent=True)
+    def get_tournament(self, guild_id: int, tournament_id: str) -> Optional[Dict]:
+        """Get a tournament's standings and progress"""
+        try:
+            snapshot = self.db.collection('tournaments').document(tournament_id).get(**self._rpc_options)
+            
+            if not snapshot.exists:
+                return None
+                
+            tournament_data = snapshot.to_dict()
+            if tournament_data.get('discord_guild_id') != guild_id:
+                return None
+                
+            return self._tournament_summary(tournament_id, tournament_data)
+            
+        except Exception as e:
+            print(f"Error getting tournament: {e}")
+            raise
+
+    def assign_legacy_data_to_guild(self, guild_id: int) -> Tuple[int, int]:
+        """Attach challenges and stats written before guild partitioning to a guild.
+        
+        Legacy stats are merged into any stats the guild already has. Returns the number of challenges and stats documents migrated."""
+        try:
+            batch = self.db.batch()
+            pending_writes = 0
+            migrated_challenges = 0
+            migrated_stats = 0
+            
+            for doc in self.db.collection('challenges').stream():
+                if 'discord_guild_id' in doc.to_dict():
+                    continue
+                batch.update(doc.reference, {'discord_guild_id': guild_id})
+                migrated_challenges += 1
+                pending_writes += 1
+                if pending_writes >= 400:
+                    batch.commit()
+                    batch = self.db.batch()
+                    pending_writes = 0
+                    
+            for doc in self.db.collection('player_stats').stream():
+                data = doc.to_dict()
+                if 'discord_guild_id' in data:
+                    continue
+                # Added to, not overwritten, so games already recorded under the
+                # guild since the deploy are kept alongside the legacy ones
+                self._write_stats_delta(
+                    batch, guild_id, data['player_id'], data.get('player_name', f"Player #{data['player_id']}"),
+                    data['game'], data.get('wins', 0), data.get('losses', 0), data.get('draws', 0),
+                    data.get('total_games', 0)
+                )
+                batch.delete(doc.reference)
+                migrated_stats += 1
+                pending_writes += 2
+                if pending_writes >= 400:
+                    batch.commit()
+                    batch = self.db.batch()
+                    pending_writes = 0
+                    
+            if pending_writes:
+                batch.commit()
+                
+            return migrated_challenges, migrated_stats
+            
+        except Exception as e:
+            print(f"Error assigning legacy data to guild: {e}")
+            raise
+
+    def rebuild_open_challenge_summaries(self) -> int:
+        """Rebuild every player's open_challenges summary from the challenges collection.
+        
+        Needed once for challenges created before the summaries existed.
+        Returns the number of users documents written."""
+        try:
+            summaries = {}
+            for status in ('pending', 'accepted'):
+                challenges = self.db.collection('challenges').where(
+                    filter=firestore.FieldFilter('status', '==', status)
+                ).stream()
+                for doc in challenges:
+                    for player_id, player_name, entry in self._open_challenge_entries(doc.to_dict(), status):
+                        summary = summaries.setdefault(player_id, {'player_name': player_name, 'open_challenges': {}})
+                        summary['open_challenges'][doc.id] = entry
+                        
+            # Clear summaries left over for players who no longer have open challenges
+            for doc in self.db.collection('users').stream():
+                data = doc.to_dict()
+                if data.get('open_challenges') and data.get('player_id') not in summaries:
+                    summaries[data['player_id']] = {'player_name': data.get('player_name'), 'open_challenges': {}}
+                    
+            batch = self.db.batch()
+            pending_writes = 0
+            for player_id, summary in summaries.items():
+                # Merging only these fields replaces the whole open_challenges map
+                batch.set(self._user_ref(player_id), {'player_id': player_id, **summary},
+                          merge=['player_id', 'player_name', 'open_challenges'])
+                pending_writes += 1
+                if pending_writes >= 400:
+                    batch.commit()
+                    batch = self.db.batch()
+                    pending_writes = 0
+                    
+            if pending_writes:
+                batch.commit()
+                
+            return len(summaries)
+            
+        except Exception as e:
+            print(f"Error rebuilding open challenge summaries: {e}")
+            raise
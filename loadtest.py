@@ -0,0 +1,483 @@
+"""Load and soak test ChallengeBot without Discord or Firestore.
+
+Thousands of virtual users send a realistic mix of !challenge, !accept,
+!report, !leaderboard and !stats messages. The messages go through the real
+ChallengeBot command pipeline and ChallengeCommands cog, with Discord
+replaced by stub members, guilds and messages and Firestore by an in-memory
+stand-in with configurable latency. Concurrency ramps up over time. Every
+interval the run reports throughput, latency percentiles, event-loop lag and
+memory growth.
+
+Run with: python loadtest.py --users 2000 --ramp 120 --duration 1800
+"""
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+from discord.ext import commands
+
+import config
+from bot import ChallengeBot, ChallengeCommands
+from models import Challenge, OpenChallenge, PlayerStats, PlayerTotals
+
+COMMAND_MIX = {
+    'challenge': 25,
+    'accept': 20,
+    'report': 20,
+    'leaderboard': 20,
+    'stats': 15
+}
+
+class InMemoryDatabase:
+    """Stand-in for ChallengeDatabase covering the methods the load mix uses.
+
+    Each method sleeps for latency seconds per Firestore RPC the real method
+    would make, so thread pool and event loop pressure resemble production.
+    Finished challenges are dropped, so a long soak measures the bot's own
+    memory growth and not this store's."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._challenges: Dict[str, Challenge] = {}
+        self._challenges_by_user: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self._stats: Dict[Tuple[int, int, str], PlayerStats] = {}
+
+    def _rpc(self, count: int = 1):
+        if self.latency:
+            time.sleep(self.latency * count * random.uniform(0.5, 1.5))
+
+    def connect(self):
+        pass
+
+    def warm_up(self) -> bool:
+        return True
+
+    def create_challenge(self, guild_id: int, challenger_id: int, challenger_name: str,
+                         opponent_id: int, opponent_name: str, game: str, channel_id: Optional[int] = None) -> str:
+        self._rpc()
+        with self._lock:
+            self._next_id += 1
+            challenge_id = f"lt{self._next_id:012d}"
+            self._challenges[challenge_id] = Challenge(
+                challenge_id, guild_id, channel_id, challenger_id, challenger_name,
+                opponent_id, opponent_name, game, 'pending', created_at=datetime.now()
+            )
+            self._challenges_by_user[(guild_id, challenger_id)].add(challenge_id)
+            self._challenges_by_user[(guild_id, opponent_id)].add(challenge_id)
+        return challenge_id
+
+    def _user_challenges(self, guild_id: int, user_id: int, status: str) -> List[Challenge]:
+        with self._lock:
+            return [
+                self._challenges[challenge_id]
+                for challenge_id in self._challenges_by_user.get((guild_id, user_id), ())
+                if self._challenges[challenge_id].status == status
+            ]
+
+    def get_pending_challenges_for_user(self, guild_id: int, user_id: int) -> List[Challenge]:
+        self._rpc(2)
+        return self._user_challenges(guild_id, user_id, 'pending')
+
+    def get_active_challenges(self, guild_id: int, user_id: int) -> List[Challenge]:
+        self._rpc(2)
+        return self._user_challenges(guild_id, user_id, 'accepted')
+
+    def get_open_challenges(self, guild_id: int, user_id: int) -> List[OpenChallenge]:
+        self._rpc()
+        with self._lock:
+            return [
+                OpenChallenge(
+                    challenge.id, guild_id, challenge.game, challenge.status,
+                    challenge.opponent_id if challenge.challenger_id == user_id else challenge.challenger_id,
+                    challenge.other_player_name(user_id), challenge.challenger_id == user_id
+                )
+                for challenge in (self._challenges[challenge_id]
+                                  for challenge_id in sorted(self._challenges_by_user.get((guild_id, user_id), ())))
+            ]
+
+    def accept_challenge(self, guild_id: int, challenge_id: str, accepted_by_id: int) -> bool:
+        self._rpc(2)
+        with self._lock:
+            challenge = self._challenges.get(challenge_id)
+            if not challenge or challenge.guild_id != guild_id or challenge.opponent_id != accepted_by_id:
+                return False
+            if challenge.status != 'pending':
+                return False
+            challenge.status = 'accepted'
+            challenge.accepted_at = datetime.now()
+        return True
+
+    def _forget(self, challenge: Challenge):
+        del self._challenges[challenge.id]
+        self._challenges_by_user[(challenge.guild_id, challenge.challenger_id)].discard(challenge.id)
+        self._challenges_by_user[(challenge.guild_id, challenge.opponent_id)].discard(challenge.id)
+
+    def report_result(self, guild_id: int, challenge_id: str, reporter_id: int,
+                      result: str, winner_id: int = None, loser_id: int = None) -> bool:
+        # Transactional challenge read, then one commit for the challenge, stats and summaries
+        self._rpc(2)
+        with self._lock:
+            challenge = self._challenges.get(challenge_id)
+            if not challenge or challenge.guild_id != guild_id or challenge.status != 'accepted':
+                return False
+            if reporter_id not in (challenge.challenger_id, challenge.opponent_id):
+                return False
+
+            for player_id, player_name in ((challenge.challenger_id, challenge.challenger_name),
+                                           (challenge.opponent_id, challenge.opponent_name)):
+                key = (guild_id, player_id, challenge.game)
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = PlayerStats(guild_id, player_id, player_name, challenge.game)
+                stats.total_games += 1
+                if result == 'draw':
+                    stats.draws += 1
+                elif player_id == winner_id:
+                    stats.wins += 1
+                elif player_id == loser_id:
+                    stats.losses += 1
+
+            self._forget(challenge)
+        return True
+
+    def cancel_challenge(self, guild_id: int, challenge_id: str, user_id: int) -> bool:
+        self._rpc(2)
+        with self._lock:
+            challenge = self._challenges.get(challenge_id)
+            if not challenge or challenge.guild_id != guild_id or challenge.challenger_id != user_id:
+                return False
+            if challenge.status != 'pending':
+                return False
+            self._forget(challenge)
+        return True
+
+    @staticmethod
+    def _fresh(result, include_staleness: bool):
+        """Match ChallengeDatabase's include_staleness option; this store is never stale"""
+        return (result, False) if include_staleness else result
+
+    def get_leaderboard(self, guild_id: int, game: str, limit: int = 10, include_staleness: bool = False):
+        self._rpc()
+        with self._lock:
+            stats = [s for (g, _, stats_game), s in self._stats.items() if g == guild_id and stats_game == game]
+        stats.sort(key=lambda s: s.wins, reverse=True)
+        return self._fresh(stats[:limit], include_staleness)
+
+    def get_overall_leaderboard(self, guild_id: int, limit: int = 10, include_staleness: bool = False):
+        # The real method streams every stats document in the guild
+        self._rpc(3)
+        totals: Dict[int, PlayerTotals] = {}
+        with self._lock:
+            for (g, player_id, _), stats in self._stats.items():
+                if g != guild_id:
+                    continue
+                if player_id not in totals:
+                    totals[player_id] = PlayerTotals(guild_id, player_id, stats.player_name)
+                totals[player_id].add(stats)
+        leaderboard = [player for player in totals.values() if player.total_games > 0]
+        leaderboard.sort(key=lambda player: (player.wins, player.win_rate), reverse=True)
+        return self._fresh(leaderboard[:limit], include_staleness)
+
+    def get_user_stats(self, guild_id: int, user_id: int, game: str = None, include_staleness: bool = False):
+        self._rpc()
+        with self._lock:
+            if game:
+                stats = self._stats.get((guild_id, user_id, game)) or PlayerStats(guild_id, user_id, f"Player #{user_id}", game)
+            else:
+                stats = {g: s for (sg, player_id, g), s in self._stats.items() if sg == guild_id and player_id == user_id}
+        return self._fresh(stats, include_staleness)
+
+    def pending_for_opponent(self, guild_id: int, user_id: int) -> List[str]:
+        """IDs of challenges waiting on this user, as they'd see from their notifications"""
+        with self._lock:
+            return [
+                challenge_id for challenge_id in self._challenges_by_user.get((guild_id, user_id), ())
+                if self._challenges[challenge_id].status == 'pending'
+                and self._challenges[challenge_id].opponent_id == user_id
+            ]
+
+    def accepted_for_user(self, guild_id: int, user_id: int) -> List[str]:
+        with self._lock:
+            return [
+                challenge_id for challenge_id in self._challenges_by_user.get((guild_id, user_id), ())
+                if self._challenges[challenge_id].status == 'accepted'
+            ]
+
+class VirtualMember(discord.Member):
+    """A guild member that exists only in this process"""
+
+    __slots__ = ('_virtual_id', '_virtual_name')
+
+    def __init__(self, member_id: int, name: str):
+        self._virtual_id = member_id
+        self._virtual_name = name
+
+    id = property(lambda self: self._virtual_id)
+    name = property(lambda self: self._virtual_name)
+    display_name = property(lambda self: self._virtual_name)
+    mention = property(lambda self: f"<@{self._virtual_id}>")
+    bot = property(lambda self: False)
+
+    def __hash__(self) -> int:
+        return self._virtual_id >> 22
+
+class VirtualGuild:
+    def __init__(self, guild_id: int, members: List[VirtualMember]):
+        self.id = guild_id
+        self.name = f"Load Test Guild {guild_id}"
+        self.members = {member.id: member for member in members}
+
+    def get_member(self, member_id: int) -> Optional[VirtualMember]:
+        return self.members.get(member_id)
+
+    def get_member_named(self, name: str) -> Optional[VirtualMember]:
+        return None
+
+    def get_role(self, role_id: int):
+        return None
+
+class VirtualChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+
+class VirtualMessage:
+    def __init__(self, content: str, author: VirtualMember, guild: VirtualGuild, channel: VirtualChannel, state):
+        self._state = state
+        self.content = content
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+        self.mentions = []
+        self.attachments = []
+
+class LoadTestContext(commands.Context):
+    """Context whose replies are recorded instead of sent to Discord"""
+
+    async def send(self, content: Optional[str] = None, **kwargs):
+        self.responses = getattr(self, 'responses', [])
+        self.responses.append(content if content is not None else kwargs.get('embed'))
+
+class Reservoir:
+    """Fixed-size uniform sample of a stream, so percentiles stay cheap over a long soak"""
+
+    def __init__(self, size: int = 10000):
+        self.size = size
+        self.count = 0
+        self.samples: List[float] = []
+
+    def add(self, value: float):
+        self.count += 1
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            index = random.randrange(self.count)
+            if index < self.size:
+                self.samples[index] = value
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def max(self) -> float:
+        return max(self.samples, default=0.0)
+
+class Metrics:
+    def __init__(self):
+        self.by_command: Dict[str, Reservoir] = defaultdict(Reservoir)
+        self.errors_by_command: Dict[str, int] = defaultdict(int)
+        self.reset_interval()
+
+    def reset_interval(self):
+        self.interval_latency = Reservoir()
+        self.interval_lag = Reservoir()
+        self.interval_errors = 0
+
+    def record(self, command: str, latency: float, ok: bool):
+        self.by_command[command].add(latency)
+        self.interval_latency.add(latency)
+        if not ok:
+            self.errors_by_command[command] += 1
+            self.interval_errors += 1
+
+def rss_bytes() -> int:
+    """Resident set size of this process (peak size where /proc isn't available)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class VirtualUser:
+    def __init__(self, member: VirtualMember, guild: VirtualGuild, channel: VirtualChannel,
+                 bot: ChallengeBot, db: InMemoryDatabase, metrics: Metrics, think_time: float):
+        self.member = member
+        self.guild = guild
+        self.channel = channel
+        self.bot = bot
+        self.db = db
+        self.metrics = metrics
+        self.think_time = think_time
+        self.others = [other for other in guild.members.values() if other.id != member.id]
+
+    def next_message(self) -> Tuple[str, str]:
+        """Pick the next command, falling back to a new challenge when there's nothing to accept or report"""
+        command = random.choices(list(COMMAND_MIX), weights=list(COMMAND_MIX.values()))[0]
+        game = random.choice(config.SUPPORTED_GAMES)
+
+        if command == 'accept':
+            pending = self.db.pending_for_opponent(self.guild.id, self.member.id)
+            if pending:
+                return command, f"!accept {random.choice(pending)}"
+            command = 'challenge'
+        elif command == 'report':
+            accepted = self.db.accepted_for_user(self.guild.id, self.member.id)
+            if accepted:
+                return command, f"!report {random.choice(accepted)} {random.choice(['win', 'win', 'loss', 'draw'])}"
+            command = 'challenge'
+
+        if command == 'challenge':
+            return command, f"!challenge {random.choice(self.others).mention} {game}"
+        if command == 'leaderboard':
+            return command, random.choice(["!leaderboard", f"!leaderboard {game}"])
+        return command, random.choice(["!stats", f"!stats {random.choice(self.others).mention}"])
+
+    async def run(self, stop: asyncio.Event):
+        # Stagger the first message so a ramp step doesn't arrive as one burst
+        await asyncio.sleep(random.uniform(0, self.think_time))
+        while not stop.is_set():
+            command, content = self.next_message()
+            message = VirtualMessage(content, self.member, self.guild, self.channel, self.bot._connection)
+
+            started = time.perf_counter()
+            ctx = await self.bot.get_context(message, cls=LoadTestContext)
+            await self.bot.invoke(ctx)
+            latency = time.perf_counter() - started
+
+            responses = getattr(ctx, 'responses', [])
+            ok = bool(responses) and not any(isinstance(r, str) and r.startswith("❌") for r in responses)
+            self.metrics.record(command, latency, ok)
+
+            await asyncio.sleep(random.expovariate(1 / self.think_time))
+
+async def sample_loop_lag(metrics: Metrics, stop: asyncio.Event, period: float = 0.05):
+    """Measure how late the event loop wakes a sleeping task"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(period)
+        metrics.interval_lag.add(max(0.0, time.perf_counter() - started - period))
+
+def format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms"
+
+async def run(args):
+    random.seed(args.seed)
+    if args.executor_workers:
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.executor_workers))
+
+    db = InMemoryDatabase(latency=args.backend_latency / 1000)
+    bot = ChallengeBot()
+    bot.db = db
+    bot._connection.user = VirtualMember(1, "ChallengeBot")
+    await bot.add_cog(ChallengeCommands(bot))
+    # Go through the real readiness gate, backed by the stand-in
+    await bot._start_backend()
+
+    metrics = Metrics()
+    users_per_guild = max(2, args.users // args.guilds)
+    virtual_users = []
+    for guild_index in range(args.guilds):
+        guild_id = 10 ** 17 + guild_index
+        members = [
+            VirtualMember(2 * 10 ** 17 + guild_index * users_per_guild + i, f"User{guild_index}-{i}")
+            for i in range(users_per_guild)
+        ]
+        guild = VirtualGuild(guild_id, members)
+        channel = VirtualChannel(3 * 10 ** 17 + guild_index)
+        for member in members:
+            virtual_users.append(VirtualUser(member, guild, channel, bot, db, metrics, args.think_time))
+    random.shuffle(virtual_users)
+
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(sample_loop_lag(metrics, stop))]
+    started = time.perf_counter()
+    rss_start = rss_bytes()
+    print(f"Load test: {len(virtual_users)} users in {args.guilds} guild(s), ramping from {args.start_users} "
+          f"over {args.ramp:.0f}s, {args.duration:.0f}s total, {args.backend_latency:.0f}ms backend latency, "
+          f"{args.think_time:.1f}s mean think time")
+
+    spawned = 0
+    next_report = started + args.interval
+    last_report = started
+    last_count = 0
+    while True:
+        now = time.perf_counter()
+        elapsed = now - started
+        if elapsed >= args.duration:
+            break
+
+        # Ramp linearly from start_users to the full population
+        ramp_fraction = min(1.0, elapsed / args.ramp) if args.ramp > 0 else 1.0
+        target = min(len(virtual_users), int(args.start_users + (len(virtual_users) - args.start_users) * ramp_fraction))
+        while spawned < target:
+            tasks.append(asyncio.create_task(virtual_users[spawned].run(stop)))
+            spawned += 1
+
+        if now >= next_report:
+            total = sum(reservoir.count for reservoir in metrics.by_command.values())
+            interval = metrics.interval_latency
+            rss = rss_bytes()
+            print(f"[{elapsed:6.0f}s] users {spawned:5d} | {(total - last_count) / (now - last_report):7.1f} ops/s | "
+                  f"p50 {format_ms(interval.percentile(50))} p95 {format_ms(interval.percentile(95))} "
+                  f"p99 {format_ms(interval.percentile(99))} | errors {metrics.interval_errors} | "
+                  f"loop lag p99 {format_ms(metrics.interval_lag.percentile(99))} max {format_ms(metrics.interval_lag.max())} | "
+                  f"rss {rss / 2 ** 20:.1f} MiB ({(rss - rss_start) / 2 ** 20:+.1f})")
+            metrics.reset_interval()
+            last_report = now
+            last_count = total
+            next_report += args.interval
+
+        await asyncio.sleep(0.1)
+
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    total = sum(reservoir.count for reservoir in metrics.by_command.values())
+    print(f"\nCompleted {total} commands in {elapsed:.0f}s ({total / elapsed:.1f} ops/s), "
+          f"memory growth {(rss_bytes() - rss_start) / 2 ** 20:+.1f} MiB")
+    print(f"{'command':<12} {'count':>8} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for command, reservoir in sorted(metrics.by_command.items()):
+        print(f"{command:<12} {reservoir.count:>8} {metrics.errors_by_command[command]:>7} "
+              f"{format_ms(reservoir.percentile(50)):>9} {format_ms(reservoir.percentile(95)):>9} "
+              f"{format_ms(reservoir.percentile(99)):>9} {format_ms(reservoir.max()):>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and soak test ChallengeBot with virtual users")
+    parser.add_argument('--users', type=int, default=2000, help="virtual users at full load")
+    parser.add_argument('--start-users', type=int, default=50, help="virtual users at the start of the ramp")
+    parser.add_argument('--guilds', type=int, default=1, help="guilds to spread the users across")
+    parser.add_argument('--ramp', type=float, default=60, help="seconds to ramp up to --users")
+    parser.add_argument('--duration', type=float, default=300, help="total run time in seconds, including the ramp")
+    parser.add_argument('--interval', type=float, default=10, help="seconds between progress reports")
+    parser.add_argument('--think-time', type=float, default=5, help="mean seconds each user waits between commands")
+    parser.add_argument('--backend-latency', type=float, default=20, help="simulated milliseconds per Firestore RPC")
+    parser.add_argument('--executor-workers', type=int, default=0,
+                        help="threads for blocking database calls (default: asyncio's default pool)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for a repeatable run")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+class PlayerStats:
+    """One player's record in one game.
+
+    Uses __slots__ rather than a dict per document so that caches holding
+    thousands of these per guild stay small. win_rate is computed on access
+    instead of stored."""
+
+    __slots__ = ('guild_id', 'player_id', 'player_name', 'game', 'wins', 'losses', 'draws', 'total_games')
+
+    def __init__(self, guild_id: Optional[int], player_id: int, player_name: str, game: Optional[str],
+                 wins: int = 0, losses: int = 0, draws: int = 0, total_games: int = 0):
+        self.guild_id = guild_id
+        self.player_id = player_id
+        self.player_name = player_name
+        self.game = game
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+        self.total_games = total_games
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PlayerStats':
+        """Build from a player_stats document"""
+        player_id = data['player_id']
+        return cls(
+            guild_id=data.get('discord_guild_id'),
+            player_id=player_id,
+            player_name=data.get('player_name', f"Player #{player_id}"),
+            game=data['game'],
+            wins=data.get('wins', 0),
+            losses=data.get('losses', 0),
+            draws=data.get('draws', 0),
+            total_games=data.get('total_games', 0)
+        )
+
+    @property
+    def win_rate(self) -> float:
+        """Percentage of games won, to one decimal place"""
+        if self.total_games <= 0:
+            return 0
+        return round((self.wins / self.total_games) * 100, 1)
+
+    def __repr__(self) -> str:
+        return (f"PlayerStats(player_id={self.player_id!r}, game={self.game!r}, "
+                f"wins={self.wins}, losses={self.losses}, draws={self.draws})")
+
+class PlayerTotals(PlayerStats):
+    """A player's record summed across every game, with the per-game breakdown"""
+
+    __slots__ = ('games',)
+
+    def __init__(self, guild_id: Optional[int], player_id: int, player_name: str):
+        super().__init__(guild_id, player_id, player_name, game=None)
+        self.games: Dict[str, PlayerStats] = {}
+
+    def add(self, stats: PlayerStats):
+        """Fold one game's stats into the totals"""
+        self.games[stats.game] = stats
+        self.wins += stats.wins
+        self.losses += stats.losses
+        self.draws += stats.draws
+        self.total_games += stats.total_games
+
+class Challenge:
+    """A challenge between two players, as stored in the challenges collection"""
+
+    __slots__ = ('id', 'guild_id', 'channel_id', 'challenger_id', 'challenger_name', 'opponent_id', 'opponent_name',
+                 'game', 'status', 'result', 'winner_id', 'loser_id', 'created_at', 'accepted_at', 'completed_at',
+                 'tournament_id', 'tournament_round')
+
+    def __init__(self, id: str, guild_id: Optional[int], channel_id: Optional[int],
+                 challenger_id: int, challenger_name: str, opponent_id: int, opponent_name: str, game: str,
+                 status: str, result: Optional[str] = None, winner_id: Optional[int] = None,
+                 loser_id: Optional[int] = None, created_at: Optional[datetime] = None,
+                 accepted_at: Optional[datetime] = None, completed_at: Optional[datetime] = None,
+                 tournament_id: Optional[str] = None, tournament_round: Optional[int] = None):
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.challenger_id = challenger_id
+        self.challenger_name = challenger_name
+        self.opponent_id = opponent_id
+        self.opponent_name = opponent_name
+        self.game = game
+        self.status = status
+        self.result = result
+        self.winner_id = winner_id
+        self.loser_id = loser_id
+        self.created_at = created_at
+        self.accepted_at = accepted_at
+        self.completed_at = completed_at
+        self.tournament_id = tournament_id
+        self.tournament_round = tournament_round
+
+    @classmethod
+    def from_dict(cls, challenge_id: str, data: Dict) -> 'Challenge':
+        """Build from a challenges document and its ID"""
+        return cls(
+            id=challenge_id,
+            guild_id=data.get('discord_guild_id'),
+            channel_id=data.get('discord_channel_id'),
+            challenger_id=data['challenger_id'],
+            challenger_name=data['challenger_name'],
+            opponent_id=data['opponent_id'],
+            opponent_name=data['opponent_name'],
+            game=data['game'],
+            status=data['status'],
+            result=data.get('result'),
+            winner_id=data.get('winner_id'),
+            loser_id=data.get('loser_id'),
+            created_at=data.get('created_at'),
+            accepted_at=data.get('accepted_at'),
+            completed_at=data.get('completed_at'),
+            tournament_id=data.get('tournament_id'),
+            tournament_round=data.get('tournament_round')
+        )
+
+    def other_player_name(self, player_id: int) -> str:
+        """Name of the player on the other side of the challenge from player_id"""
+        return self.opponent_name if player_id == self.challenger_id else self.challenger_name
+
+    def __repr__(self) -> str:
+        return (f"Challenge(id={self.id!r}, game={self.game!r}, status={self.status!r}, "
+                f"challenger_id={self.challenger_id!r}, opponent_id={self.opponent_id!r})")
+
+class OpenChallenge:
+    """A pending or accepted challenge as summarised on a player's users document"""
+
+    __slots__ = ('id', 'guild_id', 'game', 'status', 'opponent_id', 'opponent_name', 'is_challenger')
+
+    def __init__(self, id: str, guild_id: int, game: str, status: str,
+                 opponent_id: int, opponent_name: str, is_challenger: bool):
+        self.id = id
+        self.guild_id = guild_id
+        self.game = game
+        self.status = status
+        self.opponent_id = opponent_id
+        self.opponent_name = opponent_name
+        self.is_challenger = is_challenger
+
+    @classmethod
+    def from_dict(cls, challenge_id: str, data: Dict) -> 'OpenChallenge':
+        """Build from one entry of a users document's open_challenges map"""
+        return cls(
+            id=challenge_id,
+            guild_id=data['discord_guild_id'],
+            game=data['game'],
+            status=data['status'],
+            opponent_id=data['opponent_id'],
+            opponent_name=data['opponent_name'],
+            is_challenger=data['is_challenger']
+        )
+
+    def __repr__(self) -> str:
+        return (f"OpenChallenge(id={self.id!r}, game={self.game!r}, status={self.status!r}, "
+                f"opponent_id={self.opponent_id!r})")
@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Stop calling a failing backend until it has had time to recover.
+
+    After failure_threshold consecutive failures the breaker opens and every
+    call fails fast. Once reset_timeout has passed a single trial call is let
+    through (half-open); it closes the breaker on success or reopens it on
+    failure."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current breaker state"""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the backend right now"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        """Close the breaker after a successful call"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Count a failed call, opening the breaker once the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff: a random wait up to base_delay * 2^attempt, capped at max_delay"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+def retry_call(func: Callable[[float], Any], *, attempts: int, base_delay: float, max_delay: float,
+               deadline: float, is_retryable: Callable[[Exception], bool]) -> Any:
+    """Call func, retrying retryable errors with full-jitter exponential backoff.
+
+    func is passed the seconds left before deadline and must finish within
+    them, so the whole call, retries included, stays inside deadline. Gives
+    up once attempts are used up or the next wait would pass the deadline."""
+    give_up_at = time.monotonic() + deadline
+    for attempt in range(attempts):
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Gave up after {deadline}s")
+        try:
+            return func(remaining)
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            if time.monotonic() + delay >= give_up_at:
+                raise
+            time.sleep(delay)
+
+class LastKnownCache:
+    """Bounded store of the most recent successful result per key, used to serve reads while the backend is down"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,110 @@
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+SWISS = 'swiss'
+ROUND_ROBIN = 'round_robin'
+FORMATS = (SWISS, ROUND_ROBIN)
+
+# Points awarded per game
+WIN_POINTS = 1.0
+DRAW_POINTS = 0.5
+BYE_POINTS = 1.0
+
+Pairing = Tuple[int, int]
+
+def total_rounds(tournament_format: str, player_count: int) -> int:
+    """Number of rounds needed for a field of player_count players"""
+    if tournament_format == ROUND_ROBIN:
+        # Odd fields get a phantom player, so everyone sits out exactly once
+        return player_count - 1 if player_count % 2 == 0 else player_count
+    return max(1, math.ceil(math.log2(player_count)))
+
+def round_robin_pairings(players: List[int], round_index: int) -> Tuple[List[Pairing], Optional[int]]:
+    """Pairings for round round_index (0-based) using the circle method.
+
+    players must be in the same order every round. Returns the pairings and
+    the player with a bye, if any."""
+    roster: List[Optional[int]] = list(players)
+    if len(roster) % 2:
+        roster.append(None)
+
+    # Keep the first player fixed and rotate everyone else one seat per round
+    count = len(roster)
+    rotation = round_index % (count - 1)
+    rest = roster[1:]
+    if rotation:
+        rest = rest[-rotation:] + rest[:-rotation]
+    circle = [roster[0]] + rest
+
+    pairings = []
+    bye = None
+    for i in range(count // 2):
+        first, second = circle[i], circle[count - 1 - i]
+        if first is None or second is None:
+            bye = first if second is None else second
+        else:
+            pairings.append((first, second))
+
+    return pairings, bye
+
+def swiss_pairings(players: Iterable[int], scores: Dict[int, float], seeds: Dict[int, float],
+                   opponents: Dict[int, Set[int]], byes: Set[int]) -> Tuple[List[Pairing], Optional[int]]:
+    """Pair players with similar scores while avoiding rematches.
+
+    Players are ranked by score, then seed. Each player, from the top down, is
+    paired with the highest-ranked remaining player they haven't met. Any
+    rematches that greedy pass can't avoid are then repaired by swapping
+    partners with a nearby pairing. This takes O(n^2) time in the worst case,
+    so fields of several hundred players pair instantly. Returns the
+    pairings and the player with a bye, if any."""
+    ranked = sorted(players, key=lambda player: (scores.get(player, 0), seeds.get(player, 0)), reverse=True)
+
+    bye = None
+    if len(ranked) % 2:
+        # The lowest-ranked player who hasn't already had a bye sits out
+        bye = next((player for player in reversed(ranked) if player not in byes), ranked[-1])
+        ranked.remove(bye)
+
+    pairings = []
+    while ranked:
+        player = ranked.pop(0)
+        played = opponents.get(player, set())
+        index = next((i for i, candidate in enumerate(ranked) if candidate not in played), 0)
+        pairings.append((player, ranked.pop(index)))
+
+    _repair_rematches(pairings, opponents)
+    return pairings, bye
+
+def _is_rematch(first: int, second: int, opponents: Dict[int, Set[int]]) -> bool:
+    return second in opponents.get(first, set())
+
+def _repair_rematches(pairings: List[Pairing], opponents: Dict[int, Set[int]]):
+    """Swap partners between pairings to remove rematches, preferring the closest pairing in the ranking"""
+    for i, (first, second) in enumerate(pairings):
+        if not _is_rematch(first, second, opponents):
+            continue
+
+        # Search outward from this pairing so swaps stay between similar scores
+        for distance in range(1, len(pairings)):
+            swapped = False
+            for j in (i + distance, i - distance):
+                if not 0 <= j < len(pairings):
+                    continue
+                third, fourth = pairings[j]
+                for new_i, new_j in (((first, third), (second, fourth)), ((first, fourth), (second, third))):
+                    if not _is_rematch(*new_i, opponents) and not _is_rematch(*new_j, opponents):
+                        pairings[i], pairings[j] = new_i, new_j
+                        swapped = True
+                        break
+                if swapped:
+                    break
+            if swapped:
+                break
+
+def round_points(result: Optional[str], winner_id: Optional[int], player_id: int) -> float:
+    """Points a player earns from one completed game"""
+    if result == 'draw':
+        return DRAW_POINTS
+    if result in ('win', 'loss') and winner_id == player_id:
+        return WIN_POINTS
+    return 0.0